@@ -1,66 +1,350 @@
-""" Модуль analysis.py Содержит функции анализа данных и визуализации с использованием pandas, matplotlib, seaborn и networkx. """
+"""
+Модуль analysis.py
+Содержит функции анализа данных и визуализации с использованием pandas, matplotlib, seaborn и networkx.
 
-import pandas as pd import matplotlib.pyplot as plt import seaborn as sns import networkx as nx
+Тяжёлые библиотеки импортируются внутри функций при первом вызове, поэтому
+импорт модуля не замедляет запуск приложения.
+"""
 
-def top_5_clients(orders_df): """ Определяет топ 5 клиентов по числу заказов.
+import warnings
 
-Parameters
-----------
-orders_df : pandas.DataFrame
-    Датафрейм с данными заказов. Должен иметь столбец 'client'.
+# Граф с большим числом вершин build_client_graph отображает частично:
+# только MAX_DRAW_NODES вершин с наибольшей суммарной силой связей.
+MAX_DRAW_NODES = 300
+# Граф с большим числом вершин отображается без подписей.
+MAX_LABELED_NODES = 100
+# Временной ряд длиннее MAX_PLOT_POINTS точек агрегируется по нескольким дням.
+MAX_PLOT_POINTS = 1000
+# Максимальное количество пар клиентов, формируемых build_client_graph за один шаг.
+PAIR_BATCH = 5_000_000
+# Количество строк, читаемых из базы за один шаг загрузчиками датафреймов.
+LOAD_CHUNK_SIZE = 100_000
 
-Returns
--------
-pandas.Series
-    Счетчик заказов для топ 5 клиентов.
-"""
-top_clients = orders_df['client'].value_counts().head(5)
-return top_clients
-def orders_over_time(orders_df): """ Отображает динамику количества заказов по датам.
-
-Parameters
-----------
-orders_df : pandas.DataFrame
-    Датафрейм с данными заказов. Должен содержать столбец 'order_date'.
-"""
-orders_df['order_date'] = pd.to_datetime(orders_df['order_date'])
-orders_df['date'] = orders_df['order_date'].dt.date
-orders_count = orders_df.groupby('date').size()
-plt.figure(figsize=(10, 5))
-sns.lineplot(x=orders_count.index, y=orders_count.values)
-plt.xlabel("Дата")
-plt.ylabel("Количество заказов")
-plt.title("Динамика заказов по датам")
-plt.xticks(rotation=45)
-plt.tight_layout()
-plt.show()
-def build_client_graph(orders_df): """ Строит граф связей клиентов: клиенты соединяются, если их заказы имеют общие товары.
-
-Parameters
-----------
-orders_df : pandas.DataFrame
-    Датафрейм с как минимум двумя столбцами 'client' и 'products',
-    где 'products' – строковое представление списка товаров.
-
-Returns
--------
-networkx.Graph
-    Граф связей между клиентами.
-"""
-G = nx.Graph()
-clients = orders_df['client'].unique()
-G.add_nodes_from(clients)
-for i, row1 in orders_df.iterrows():
-    for j, row2 in orders_df.iterrows():
-        if i >= j:
-            continue
-        prods1 = set(row1['products'].split(','))
-        prods2 = set(row2['products'].split(','))
-        if prods1.intersection(prods2):
-            G.add_edge(row1['client'], row2['client'])
-plt.figure(figsize=(8, 6))
-pos = nx.spring_layout(G)
-nx.draw(G, pos, with_labels=True, node_color="lightblue", edge_color="gray")
-plt.title("Граф связей клиентов")
-plt.show()
-return G
\ No newline at end of file
+
+def _read_sql_chunked(conn, query, params, chunk_size, categorical, datetime_columns=()):
+    """
+    Читает результат запроса порциями, сразу приводя типы столбцов.
+
+    Текстовые столбцы из categorical хранятся как категории, столбцы из
+    datetime_columns разбираются в datetime64, поэтому в памяти никогда не
+    находится полная таблица строковых объектов. Порции склеиваются по
+    столбцам: категории порций сначала приводятся к общему набору (иначе
+    concat вернул бы строки), а столбец порции освобождается сразу после
+    склейки, поэтому сверх итогового датафрейма в памяти держится не больше
+    одного столбца.
+    """
+    import pandas as pd
+
+    def convert(chunk):
+        for column in categorical:
+            chunk[column] = chunk[column].astype('category')
+        for column in datetime_columns:
+            # add_order принимает любую дату ISO 8601 ('2024-01-01',
+            # '2024-01-01T10:00:00'), поэтому формат не фиксируется.
+            values = pd.to_datetime(chunk[column], format='ISO8601', errors='coerce')
+            invalid = values.isna() & chunk[column].notna()
+            if invalid.any():
+                warnings.warn(f"Столбец {column}: {invalid.sum()} значений не разобраны как дата "
+                              f"(например, {chunk[column][invalid].iloc[0]!r}) и заменены на NaT")
+            chunk[column] = values
+        return chunk
+
+    chunks = [convert(chunk) for chunk in pd.read_sql_query(query, conn, params=params, chunksize=chunk_size)]
+    if not chunks:
+        return convert(pd.read_sql_query(query, conn, params=params))
+    columns = {}
+    for column in list(chunks[0].columns):
+        parts = [chunk.pop(column) for chunk in chunks]
+        if column in categorical:
+            categories = parts[0].cat.categories.append([part.cat.categories for part in parts[1:]]).unique()
+            parts = [part.cat.set_categories(categories) for part in parts]
+        columns[column] = pd.concat(parts, ignore_index=True)
+        del parts
+    return pd.DataFrame(columns, copy=False)
+
+
+def load_orders_df(db, date_from=None, date_to=None, chunk_size=LOAD_CHUNK_SIZE):
+    """
+    Загружает заказы из базы в датафрейм для функций анализа.
+
+    Заказы, клиенты и строки заказов соединяются в SQLite, список товаров
+    собирается через group_concat, а результат читается порциями.
+
+    Parameters
+    ----------
+    db : Database
+        База данных.
+    date_from : str, optional
+        Нижняя граница даты заказа (включительно).
+    date_to : str, optional
+        Верхняя граница даты заказа (не включительно).
+    chunk_size : int
+        Количество заказов, читаемых за один шаг.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Столбцы 'order_id', 'order_date' (datetime64), 'client' (category),
+        'discount' и 'products' (названия товаров через запятую).
+    """
+    conditions, params = [], []
+    if date_from is not None:
+        conditions.append("orders.order_date >= ?")
+        params.append(date_from)
+    if date_to is not None:
+        conditions.append("orders.order_date < ?")
+        params.append(date_to)
+    where = "WHERE " + " AND ".join(conditions) if conditions else ""
+    query = f"""
+        SELECT orders.id AS order_id, orders.order_date, clients.name AS client, orders.discount,
+               (SELECT group_concat(products.name, ',')
+                FROM order_details
+                JOIN products ON products.id = order_details.product_id
+                WHERE order_details.order_id = orders.id) AS products
+        FROM orders
+        LEFT JOIN clients ON clients.id = orders.client_id
+        {where}
+        ORDER BY orders.id
+    """
+    return _read_sql_chunked(db.conn, query, params, chunk_size,
+                             categorical=('client',), datetime_columns=('order_date',))
+
+
+def load_order_details_df(db, chunk_size=LOAD_CHUNK_SIZE):
+    """
+    Загружает строки заказов из базы в датафрейм.
+
+    Parameters
+    ----------
+    db : Database
+        База данных.
+    chunk_size : int
+        Количество строк, читаемых за один шаг.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Столбцы 'order_id', 'product' (category), 'quantity' и 'price'.
+    """
+    query = """
+        SELECT order_details.order_id, products.name AS product, order_details.quantity, order_details.price
+        FROM order_details
+        LEFT JOIN products ON products.id = order_details.product_id
+        ORDER BY order_details.order_id
+    """
+    return _read_sql_chunked(db.conn, query, [], chunk_size, categorical=('product',))
+
+
+def _new_figure(figsize, output):
+    """
+    Создаёт фигуру для графика.
+
+    При сохранении в файл фигура создаётся без pyplot, поэтому не требует
+    дисплея и не открывает окон независимо от выбранного backend.
+    """
+    if output is not None:
+        from matplotlib.figure import Figure
+        fig = Figure(figsize=figsize)
+        return fig, fig.add_subplot()
+    import matplotlib.pyplot as plt
+    fig = plt.figure(figsize=figsize)
+    return fig, fig.add_subplot()
+
+
+def _finish_figure(fig, output):
+    """Сохраняет фигуру в файл (формат по расширению, например .png или .svg) или показывает её."""
+    if output is not None:
+        fig.savefig(output)
+    else:
+        import matplotlib.pyplot as plt
+        plt.show()
+
+
+def _downsample(series, max_points):
+    """
+    Агрегирует дневной ряд по интервалам в несколько дней так, чтобы
+    в нём было не больше max_points точек.
+
+    Returns
+    -------
+    tuple(pandas.Series, int)
+        Ряд и длина интервала в днях.
+    """
+    import pandas as pd
+
+    series = series.copy()
+    series.index = pd.to_datetime(series.index)
+    days = (series.index.max() - series.index.min()).days + 1 if len(series) else 0
+    if days <= max_points:
+        return series, 1
+    step = -(-days // max_points)
+    return series.resample(f"{step}D").sum(), step
+
+
+def top_5_clients(orders_df):
+    """
+    Определяет топ 5 клиентов по числу заказов.
+
+    Parameters
+    ----------
+    orders_df : pandas.DataFrame or Database
+        Датафрейм с данными заказов. Должен иметь столбец 'client'.
+        Если передана база данных, ответ берётся из сводной таблицы
+        client_order_stats без чтения истории заказов.
+
+    Returns
+    -------
+    pandas.Series
+        Счетчик заказов для топ 5 клиентов.
+    """
+    import pandas as pd
+
+    if not isinstance(orders_df, pd.DataFrame):
+        rows = orders_df.get_top_clients(5)
+        return pd.Series([row[2] for row in rows], index=pd.Index([row[1] for row in rows], name='client'),
+                         name='count')
+    top_clients = orders_df['client'].value_counts().head(5)
+    return top_clients
+
+
+def orders_over_time(orders_df, output=None, max_points=MAX_PLOT_POINTS, date_from=None, date_to=None):
+    """
+    Отображает динамику количества заказов по датам.
+
+    Parameters
+    ----------
+    orders_df : pandas.DataFrame or Database
+        Датафрейм с данными заказов. Должен содержать столбец 'order_date';
+        датафрейм не изменяется. Если передана база данных, количество
+        заказов по дням берётся из сводной таблицы daily_order_stats.
+    output : str, optional
+        Путь к файлу изображения (.png, .svg и т.д.). Если задан, график
+        сохраняется в файл без открытия окна, что подходит для серверов
+        без дисплея.
+    max_points : int
+        Максимальное количество точек на графике; более длинный ряд
+        суммируется по интервалам в несколько дней.
+    date_from, date_to : str, optional
+        Границы периода 'YYYY-MM-DD' (начало включительно, конец не
+        включительно), как в Database.get_daily_order_stats.
+    """
+    import pandas as pd
+    import seaborn as sns
+
+    if isinstance(orders_df, pd.DataFrame):
+        dates = pd.to_datetime(orders_df['order_date'])
+        in_range = pd.Series(True, index=orders_df.index)
+        if date_from:
+            in_range &= dates >= pd.Timestamp(date_from)
+        if date_to:
+            in_range &= dates < pd.Timestamp(date_to)
+        orders_count = orders_df[in_range].groupby(dates[in_range].dt.date).size()
+    else:
+        rows = orders_df.get_daily_order_stats(date_from, date_to)
+        orders_count = pd.Series([row[1] for row in rows],
+                                 index=pd.to_datetime([row[0] for row in rows]).date)
+    orders_count, step = _downsample(orders_count, max_points)
+    fig, ax = _new_figure((10, 5), output)
+    sns.lineplot(x=orders_count.index, y=orders_count.values, ax=ax)
+    ax.set_xlabel("Дата")
+    ax.set_ylabel("Количество заказов" if step == 1 else f"Количество заказов за {step} дн.")
+    ax.set_title("Динамика заказов по датам")
+    ax.tick_params(axis="x", labelrotation=45)
+    fig.tight_layout()
+    _finish_figure(fig, output)
+
+
+def build_client_graph(orders_df, draw=True, max_draw_nodes=MAX_DRAW_NODES, max_product_clients=None,
+                       output=None):
+    """
+    Строит граф связей клиентов: клиенты соединяются, если их заказы имеют общие товары.
+
+    Вместо попарного сравнения заказов используется обратный индекс
+    товар -> клиенты: рёбра порождаются только между клиентами, купившими
+    один и тот же товар, поэтому время зависит от числа связей, а не от
+    квадрата числа заказов.
+
+    Parameters
+    ----------
+    orders_df : pandas.DataFrame
+        Датафрейм с как минимум двумя столбцами 'client' и 'products',
+        где 'products' – строковое представление списка товаров через запятую.
+    draw : bool
+        Отображать ли граф.
+    max_draw_nodes : int
+        Если вершин больше, отображается только подграф из max_draw_nodes
+        вершин с наибольшей суммарной силой связей: раскладка и отрисовка
+        полного большого графа занимают намного больше времени, чем его
+        построение. Возвращается при этом полный граф.
+    max_product_clients : int, optional
+        Товары, купленные большим числом клиентов, не порождают рёбер.
+        Такие товары связывают почти всех со всеми и определяют размер графа.
+    output : str, optional
+        Путь к файлу изображения (.png, .svg и т.д.). Если задан, граф
+        сохраняется в файл без открытия окна.
+
+    Returns
+    -------
+    networkx.Graph
+        Граф связей между клиентами. Атрибут ребра 'weight' — количество
+        различных товаров, которые покупали оба клиента.
+    """
+    import pandas as pd
+    import networkx as nx
+
+    G = nx.Graph()
+    G.add_nodes_from(orders_df['client'].unique())
+
+    # Уникальные пары (клиент, товар) в виде целочисленных кодов.
+    pairs = orders_df[['client', 'products']].dropna()
+    pairs = pairs.assign(product=pairs['products'].str.split(',')).explode('product')
+    pairs['product'] = pairs['product'].str.strip()
+    pairs = pairs[pairs['product'] != '']
+    client_codes, client_names = pd.factorize(pairs['client'])
+    product_codes, _ = pd.factorize(pairs['product'])
+    index = pd.DataFrame({'client': client_codes, 'product': product_codes}).drop_duplicates()
+    if max_product_clients is not None:
+        popularity = index.groupby('product')['client'].transform('size')
+        index = index[popularity <= max_product_clients]
+
+    # Соединение индекса с самим собой по товару даёт пары клиентов с общим
+    # товаром. Товары обрабатываются группами, чтобы промежуточная таблица
+    # пар не превышала PAIR_BATCH строк.
+    index = index.sort_values('product')
+    sizes = index.groupby('product', sort=True).size()
+    batch_of_product = (sizes * (sizes - 1) // 2).cumsum() // PAIR_BATCH
+    batches = batch_of_product.reindex(index['product']).to_numpy()
+    n_clients = len(client_names)
+    partial = []
+    for _, part in index.groupby(batches, sort=False):
+        linked = part.merge(part, on='product', suffixes=('_a', '_b'))
+        linked = linked[linked['client_a'] < linked['client_b']]
+        keys = linked['client_a'].to_numpy(dtype='int64') * n_clients + linked['client_b'].to_numpy()
+        partial.append(pd.Series(keys).value_counts(sort=False))
+    if partial:
+        weights = pd.concat(partial).groupby(level=0).sum()
+        keys = weights.index.to_numpy()
+        G.add_weighted_edges_from(zip(client_names[keys // n_clients], client_names[keys % n_clients],
+                                      weights.to_numpy().tolist()))
+
+    if draw:
+        _draw_client_graph(G, max_draw_nodes, output)
+    return G
+
+
+def _draw_client_graph(G, max_nodes, output):
+    """Рисует граф или его подграф из max_nodes наиболее связанных вершин."""
+    import networkx as nx
+
+    title = "Граф связей клиентов"
+    if G.number_of_nodes() > max_nodes:
+        strength = sorted(G.degree(weight="weight"), key=lambda item: item[1], reverse=True)
+        G = G.subgraph(node for node, _ in strength[:max_nodes])
+        title += f" (наиболее связанные {max_nodes} клиентов)"
+    fig, ax = _new_figure((8, 6), output)
+    pos = nx.spring_layout(G, seed=42, iterations=50 if G.number_of_nodes() <= MAX_LABELED_NODES else 20)
+    nx.draw(G, pos, ax=ax, with_labels=G.number_of_nodes() <= MAX_LABELED_NODES,
+            node_color="lightblue", edge_color="gray",
+            node_size=300 if G.number_of_nodes() <= MAX_LABELED_NODES else 20)
+    ax.set_title(title)
+    _finish_figure(fig, output)
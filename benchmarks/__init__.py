@@ -0,0 +1,5 @@
+"""
+Пакет benchmarks
+Содержит генератор синтетических данных магазина и замеры производительности.
+Запуск из корня проекта: python -m benchmarks.<модуль>.
+"""
@@ -0,0 +1,80 @@
+"""
+Модуль bench_indexes.py
+Сравнивает время типичных запросов к заказам без индексов и после миграции схемы.
+
+Запуск: python -m benchmarks.bench_indexes --orders 1000000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from db import Database, INDEXES
+from benchmarks.datagen import populate
+
+QUERIES = {
+    "заказы клиента": ("SELECT id, order_date FROM orders WHERE client_id = ?", "client"),
+    "детали заказа": ("SELECT product_id, quantity, price FROM order_details WHERE order_id = ?", "order"),
+    "продажи товара": ("SELECT COUNT(*) FROM order_details WHERE product_id = ?", "product"),
+    "заказы за день": ("SELECT COUNT(*) FROM orders WHERE order_date >= ? AND order_date < ?", "day"),
+}
+
+
+def index_names():
+    """Возвращает имена индексов, создаваемых миграцией."""
+    return [statement.split()[5] for statement in INDEXES]
+
+
+def run_queries(db, repeat, clients, orders, products):
+    """Выполняет каждый запрос repeat раз и возвращает среднее время в миллисекундах."""
+    results = {}
+    for title, (sql, kind) in QUERIES.items():
+        started = time.perf_counter()
+        for i in range(repeat):
+            if kind == "client":
+                params = (i * 7919 % clients + 1,)
+            elif kind == "order":
+                params = (i * 7919 % orders + 1,)
+            elif kind == "product":
+                params = (i * 7919 % products + 1,)
+            else:
+                day = f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}"
+                params = (day, day + " 23:59:59")
+            db.conn.execute(sql, params).fetchall()
+        results[title] = (time.perf_counter() - started) / repeat * 1000
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=100000)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--orders", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        for name in index_names():
+            db.conn.execute(f"DROP INDEX IF EXISTS {name}")
+        started = time.perf_counter()
+        populate(db, args.clients, args.products, args.orders)
+        print(f"Сгенерировано заказов: {args.orders} за {time.perf_counter() - started:.1f} с")
+
+        before = run_queries(db, args.repeat, args.clients, args.orders, args.products)
+        started = time.perf_counter()
+        for statement in INDEXES:
+            db.conn.execute(statement)
+        db.conn.execute("ANALYZE")
+        print(f"Миграция (построение индексов): {time.perf_counter() - started:.1f} с")
+        after = run_queries(db, args.repeat, args.clients, args.orders, args.products)
+
+        print(f"{'запрос':<20}{'до, мс':>12}{'после, мс':>12}{'ускорение':>12}")
+        for title in QUERIES:
+            print(f"{title:<20}{before[title]:>12.2f}{after[title]:>12.3f}"
+                  f"{before[title] / max(after[title], 1e-6):>11.0f}x")
+        db.conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Модуль bench_models.py
+Сравнивает объём памяти на один объект моделей из models.py (с __slots__)
+и эквивалентных классов с обычным словарём атрибутов __dict__.
+
+Запуск: python -m benchmarks.bench_models --count 100000
+"""
+
+import argparse
+import tracemalloc
+from models import Client, Product, Order, SpecialOrder
+
+
+class DictEntity:
+    """Эквивалент Entity без __slots__ для сравнения."""
+    def __init__(self, id=None):
+        self._id = id
+
+
+class DictClient(DictEntity):
+    def __init__(self, name, phone, email, id=None):
+        super().__init__(id)
+        self.name = name
+        self.phone = phone
+        self.email = email
+
+
+class DictProduct(DictEntity):
+    def __init__(self, name, description, price, id=None):
+        super().__init__(id)
+        self.name = name
+        self.description = description
+        self.price = price
+
+
+class DictOrder(DictEntity):
+    def __init__(self, client, products, order_date, id=None):
+        super().__init__(id)
+        self.client = client
+        self.products = products
+        self.order_date = order_date
+
+
+class DictSpecialOrder(DictOrder):
+    def __init__(self, client, products, order_date, discount, id=None):
+        super().__init__(client, products, order_date, id)
+        self.discount = discount
+
+
+def bytes_per_object(factory, count):
+    """Возвращает средний прирост памяти на объект, созданный factory(i)."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Список и значения полей общие для обоих вариантов: из замера вычитается
+    # только размер самого списка.
+    return (after - before - objects.__sizeof__()) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100000)
+    args = parser.parse_args()
+
+    name, phone, email, date, products = "Клиент", "+79123456789", "client@example.com", "2024-01-01", []
+    cases = {
+        "Client": (lambda i: DictClient(name, phone, email, i), lambda i: Client(name, phone, email, i)),
+        "Product": (lambda i: DictProduct(name, name, 1.0, i), lambda i: Product(name, name, 1.0, i)),
+        "Order": (lambda i: DictOrder(None, products, date, i), lambda i: Order(None, products, date, i)),
+        "SpecialOrder": (lambda i: DictSpecialOrder(None, products, date, 5, i),
+                         lambda i: SpecialOrder(None, products, date, 5, i)),
+    }
+    print(f"{'класс':<14}{'__dict__, Б':>14}{'__slots__, Б':>14}{'экономия':>10}")
+    for title, (legacy, slotted) in cases.items():
+        before = bytes_per_object(legacy, args.count)
+        after = bytes_per_object(slotted, args.count)
+        print(f"{title:<14}{before:>14.0f}{after:>14.0f}{1 - after / before:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
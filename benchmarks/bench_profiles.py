@@ -0,0 +1,77 @@
+"""
+Модуль bench_profiles.py
+Сравнивает профили настройки SQLite ("default" и "performance") на вставке
+заказов через Database.add_order и на чтении заказов, в том числе при
+параллельной записи.
+
+Запуск: python -m benchmarks.bench_profiles --orders 2000
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from db import Database, PROFILES
+from models import Client, Product, Order
+from benchmarks.datagen import populate
+
+
+def bench_profile(path, profile, orders, reads):
+    """Выполняет замеры для одного профиля и возвращает словарь метрик."""
+    db = Database(path, profile=profile)
+    populate(db, clients=1000, products=100, orders=50000)
+    clients = [Client("", "", "", id=i) for i in range(1, 1001)]
+    products = [Product("", "", 100.0, id=i) for i in range(1, 101)]
+
+    started = time.perf_counter()
+    for i in range(orders):
+        db.add_order(Order(clients[i % 1000], [(products[i % 100], 1), (products[(i * 7) % 100], 2)],
+                           "2024-06-01 12:00:00"))
+    insert_rate = orders / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for i in range(reads):
+        db.get_orders_page(limit=100, client_id=i % 1000 + 1)
+    read_ms = (time.perf_counter() - started) / reads * 1000
+
+    # Чтение из второго соединения, пока первое непрерывно пишет.
+    stop = threading.Event()
+
+    def writer():
+        writer_db = Database(path, profile=profile)
+        while not stop.is_set():
+            writer_db.add_order(Order(clients[0], [(products[0], 1)], "2024-06-02 12:00:00"))
+        writer_db.conn.close()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    started = time.perf_counter()
+    for i in range(reads):
+        db.get_orders_page(limit=100, client_id=i % 1000 + 1)
+    concurrent_ms = (time.perf_counter() - started) / reads * 1000
+    stop.set()
+    thread.join()
+    db.conn.close()
+    return {"вставка, заказов/с": insert_rate, "чтение, мс": read_ms,
+            "чтение при записи, мс": concurrent_ms}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--reads", type=int, default=100)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in PROFILES:
+            results[profile] = bench_profile(os.path.join(tmp, f"{profile}.db"), profile,
+                                             args.orders, args.reads)
+    print(f"{'метрика':<26}" + "".join(f"{profile:>14}" for profile in results))
+    for metric in next(iter(results.values())):
+        print(f"{metric:<26}" + "".join(f"{values[metric]:>14.2f}" for values in results.values()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Модуль bench_startup.py
+Замеряет время импорта точки входа main.py через python -X importtime и
+проверяет, что при запуске не загружаются тяжёлые библиотеки анализа.
+Завершается с кодом 1, если цель по времени превышена или такие библиотеки
+загружены, поэтому подходит для проверки регрессий.
+
+Запуск: python -m benchmarks.bench_startup --target-ms 300
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Цель по умолчанию для времени импорта main (мс).
+STARTUP_TARGET_MS = 300
+# Библиотеки, которые не должны загружаться при запуске приложения.
+HEAVY_MODULES = ("pandas", "numpy", "matplotlib", "seaborn", "networkx")
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_time_ms(module):
+    """Возвращает суммарное время импорта модуля (мс) по выводу -X importtime."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=PROJECT_DIR, capture_output=True, text=True, check=True)
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module and not parts[2].startswith("  "):
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"Модуль {module} не найден в выводе -X importtime")
+
+
+def loaded_heavy_modules(module):
+    """Возвращает тяжёлые библиотеки, загруженные после импорта модуля."""
+    code = (f"import sys, {module}; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_DIR,
+                            capture_output=True, text=True, check=True)
+    return [name for name in result.stdout.strip().split(",") if name]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--target-ms", type=float, default=STARTUP_TARGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    ok = True
+    for module in ("main", "analysis"):
+        timings = [import_time_ms(module) for _ in range(args.runs)]
+        median = statistics.median(timings)
+        heavy = loaded_heavy_modules(module)
+        print(f"import {module}: медиана {median:.1f} мс (мин {min(timings):.1f}, макс {max(timings):.1f})")
+        if heavy:
+            print(f"  при импорте загружены тяжёлые библиотеки: {', '.join(heavy)}")
+            ok = False
+        if module == "main" and median > args.target_ms:
+            print(f"  превышена цель {args.target_ms:.0f} мс")
+            ok = False
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Модуль bench_suite.py
+Набор замеров основных операций Database и analysis на синтетических данных
+заданного масштаба. Для каждого замера выводятся время, пропускная
+способность и пиковый объём памяти Python (tracemalloc); результаты можно
+сохранить в JSON и сравнить с предыдущим запуском.
+
+Запуск: python -m benchmarks.bench_suite --orders 100000 --output before.json
+        python -m benchmarks.bench_suite --orders 100000 --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from db import Database
+from models import Client, Product, Order
+from benchmarks.datagen import client_rows, populate, scale_counts
+
+# Операции, выполняемые по одной записи с фиксацией каждой (add_client, add_order).
+SINGLE_OPS = 1000
+# Количество заказов, по которым строится граф клиентов.
+GRAPH_ORDERS = 100000
+# Замеры analysis, которым нужен датафрейм из замера load_orders_df.
+DATAFRAME_CASES = ("top_5_clients", "orders_over_time", "build_client_graph")
+
+
+def measure(func, memory=True):
+    """
+    Выполняет func() и возвращает метрики.
+
+    func возвращает количество обработанных элементов. Пиковая память
+    учитывает только выделения Python, видимые tracemalloc (включая NumPy),
+    но не кэш страниц SQLite; при memory=True время включает накладные
+    расходы tracemalloc.
+    """
+    if memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    items = func()
+    seconds = time.perf_counter() - started
+    result = {"seconds": seconds, "items": items, "per_second": items / seconds if seconds else None}
+    if memory:
+        result["peak_mb"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return result
+
+
+def database_cases(db, tmp, counts, single_ops):
+    """Возвращает замеры операций Database в порядке выполнения."""
+    clients = [Client("", "", "", id=i) for i in range(1, min(counts["clients"], 1000) + 1)]
+    products = [Product("", "", 100.0, id=i) for i in range(1, min(counts["products"], 100) + 1)]
+
+    def get_orders():
+        return len(db.get_orders())
+
+    def iter_orders():
+        return sum(1 for _ in db.iter_orders(chunk_size=1000))
+
+    def export_csv():
+        db.export_clients_csv(os.path.join(tmp, "clients.csv"))
+        return counts["clients"]
+
+    def export_json():
+        db.export_clients_json(os.path.join(tmp, "clients.json"))
+        return counts["clients"]
+
+    def import_clients():
+        # Импорт в отдельную базу, чтобы не менять размер основного набора.
+        target = Database(os.path.join(tmp, "import.db"), profile=db.profile)
+        imported, _ = target.import_clients(client_rows(counts["clients"]))
+        target.conn.close()
+        return imported
+
+    def add_client():
+        for i in range(single_ops):
+            db.add_client(Client(f"Клиент {i}", "+79123456789", "client@example.com"))
+        return single_ops
+
+    def add_order():
+        for i in range(single_ops):
+            db.add_order(Order(clients[i % len(clients)],
+                               [(products[i % len(products)], 1), (products[i * 7 % len(products)], 2)],
+                               "2024-06-01 12:00:00"))
+        return single_ops
+
+    return [("get_orders", get_orders), ("iter_orders", iter_orders),
+            ("export_clients_csv", export_csv), ("export_clients_json", export_json),
+            ("import_clients", import_clients), ("add_client", add_client), ("add_order", add_order)]
+
+
+def analysis_cases(db, tmp, counts, graph_orders):
+    """Возвращает замеры функций analysis; требует pandas, seaborn и networkx."""
+    import analysis
+    # analysis загружает зависимости лениво, поэтому их наличие проверяется заранее.
+    import pandas, seaborn, networkx  # noqa: F401
+
+    frames = {}
+
+    def load_orders():
+        frames["orders"] = analysis.load_orders_df(db)
+        return len(frames["orders"])
+
+    def top_clients():
+        analysis.top_5_clients(frames["orders"])
+        return len(frames["orders"])
+
+    def over_time():
+        analysis.orders_over_time(frames["orders"], output=os.path.join(tmp, "orders.png"))
+        return len(frames["orders"])
+
+    def client_graph():
+        orders_df = frames["orders"].head(graph_orders)
+        analysis.build_client_graph(orders_df, draw=False)
+        return len(orders_df)
+
+    return [("load_orders_df", load_orders), ("top_5_clients", top_clients),
+            ("orders_over_time", over_time), ("build_client_graph", client_graph)]
+
+
+def print_results(results, baseline=None):
+    """Печатает таблицу результатов, при наличии — с отношением ко времени baseline."""
+    header = f"{'замер':<22}{'время, с':>10}{'элем./с':>14}{'пик, МБ':>10}"
+    print(header + (f"{'к базе':>10}" if baseline else ""))
+    for name, metrics in results.items():
+        rate = f"{metrics['per_second']:>14,.0f}" if metrics["per_second"] else f"{'-':>14}"
+        peak = f"{metrics['peak_mb']:>10.1f}" if "peak_mb" in metrics else f"{'-':>10}"
+        line = f"{name:<22}{metrics['seconds']:>10.3f}{rate}{peak}"
+        if baseline and name in baseline:
+            line += f"{metrics['seconds'] / baseline[name]['seconds']:>9.2f}x"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=100000,
+                        help="количество заказов; клиенты и товары масштабируются по scale_counts")
+    parser.add_argument("--clients", type=int)
+    parser.add_argument("--products", type=int)
+    parser.add_argument("--profile", default="default", help="профиль SQLite из db.PROFILES")
+    parser.add_argument("--single-ops", type=int, default=SINGLE_OPS)
+    parser.add_argument("--graph-orders", type=int, default=GRAPH_ORDERS)
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="выполнить только указанные замеры")
+    parser.add_argument("--skip-analysis", action="store_true", help="не замерять функции analysis")
+    parser.add_argument("--no-memory", action="store_true", help="не отслеживать память (точнее время)")
+    parser.add_argument("--output", help="файл для сохранения результатов в JSON")
+    parser.add_argument("--compare", help="JSON предыдущего запуска для сравнения")
+    args = parser.parse_args()
+
+    counts = scale_counts(args.orders)
+    if args.clients:
+        counts["clients"] = args.clients
+    if args.products:
+        counts["products"] = args.products
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"), profile=args.profile)
+        print(f"Генерация: {counts['clients']} клиентов, {counts['products']} товаров, {counts['orders']} заказов")
+
+        def generate():
+            populate(db, **counts)
+            return sum(counts.values())
+
+        def refresh_stats():
+            db.refresh_order_stats()
+            return counts["orders"]
+
+        def refresh_search():
+            db.refresh_search_index()
+            return counts["clients"] + counts["products"]
+
+        results["populate"] = measure(generate, not args.no_memory)
+        # populate пишет строки напрямую, поэтому сводные таблицы и поисковый
+        # индекс догоняются отдельно, а не в первом вызове add_order/add_client.
+        results["refresh_order_stats"] = measure(refresh_stats, not args.no_memory)
+        results["refresh_search_index"] = measure(refresh_search, not args.no_memory)
+
+        cases = []
+        if not args.skip_analysis:
+            try:
+                cases += analysis_cases(db, tmp, counts, args.graph_orders)
+            except ImportError as e:
+                print("Замеры analysis пропущены:", e)
+        # Замеры записи идут последними, чтобы не менять данные для чтения.
+        cases += database_cases(db, tmp, counts, args.single_ops)
+        if args.only:
+            selected = set(args.only)
+            if selected.intersection(DATAFRAME_CASES):
+                selected.add("load_orders_df")
+            cases = [(name, func) for name, func in cases if name in selected]
+        for name, func in cases:
+            print(f"  {name}...", flush=True)
+            results[name] = measure(func, not args.no_memory)
+        db.conn.close()
+
+    print_results(results, baseline)
+    if args.output:
+        report = {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "params": {**counts, "profile": args.profile, "single_ops": args.single_ops,
+                       "graph_orders": args.graph_orders, "memory": not args.no_memory},
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+        print(f"Результаты сохранены в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Модуль datagen.py
+Детерминированный генератор синтетических клиентов, товаров и заказов для замеров.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+START_DATE = datetime(2024, 1, 1)
+
+
+def scale_counts(orders):
+    """
+    Возвращает согласованные размеры набора данных для заданного числа заказов.
+
+    На каждого клиента в среднем приходится 10 заказов, на каждый товар —
+    около 100, но товаров не меньше 100 и не больше 10 000.
+
+    Parameters
+    ----------
+    orders : int
+        Количество заказов (например, от 10 000 до 10 000 000).
+
+    Returns
+    -------
+    dict
+        Ключи 'clients', 'products', 'orders' для populate.
+    """
+    return {"clients": max(1, orders // 10),
+            "products": max(100, min(10000, orders // 100)),
+            "orders": orders}
+
+
+def client_rows(count, seed=42):
+    """
+    Генерирует строки клиентов в формате импорта.
+
+    Parameters
+    ----------
+    count : int
+        Количество клиентов.
+    seed : int
+        Начальное значение генератора случайных чисел.
+
+    Yields
+    ------
+    dict
+        Словарь с ключами 'name', 'phone', 'email'.
+    """
+    rnd = random.Random(seed)
+    for i in range(count):
+        yield {"name": f"Клиент {i}",
+               "phone": f"+7{rnd.randrange(10 ** 9, 10 ** 10)}",
+               "email": f"client{i}@example.com"}
+
+
+def populate(db, clients, products, orders, max_lines=5, days=365, seed=42, chunk_size=10000):
+    """
+    Заполняет базу синтетическими данными напрямую через executemany.
+
+    Parameters
+    ----------
+    db : Database
+        База данных для заполнения.
+    clients, products, orders : int
+        Количество клиентов, товаров и заказов.
+    max_lines : int
+        Максимальное количество строк в одном заказе.
+    days : int
+        Длина периода, по которому распределяются даты заказов.
+    seed : int
+        Начальное значение генератора случайных чисел.
+    chunk_size : int
+        Количество заказов в одной порции вставки.
+    """
+    rnd = random.Random(seed)
+    conn = db.conn
+    client_base = conn.execute("SELECT COALESCE(MAX(id), 0) FROM clients").fetchone()[0]
+    product_base = conn.execute("SELECT COALESCE(MAX(id), 0) FROM products").fetchone()[0]
+    order_base = conn.execute("SELECT COALESCE(MAX(id), 0) FROM orders").fetchone()[0]
+    conn.executemany("INSERT INTO clients (name, phone, email) VALUES (?, ?, ?)",
+                     ((r["name"], r["phone"], r["email"]) for r in client_rows(clients, seed)))
+    prices = [round(rnd.uniform(100, 100000), 2) for _ in range(products)]
+    conn.executemany("INSERT INTO products (name, description, price) VALUES (?, ?, ?)",
+                     ((f"Товар {i}", f"Описание товара {i}", price) for i, price in enumerate(prices)))
+    seconds = days * 24 * 3600
+    for start in range(0, orders, chunk_size):
+        order_rows = []
+        detail_rows = []
+        for order_id in range(order_base + start + 1, order_base + min(start + chunk_size, orders) + 1):
+            date = START_DATE + timedelta(seconds=rnd.randrange(seconds))
+            discount = rnd.choice((0, 0, 0, 5, 10))
+            order_rows.append((order_id, date.strftime("%Y-%m-%d %H:%M:%S"),
+                               client_base + rnd.randint(1, clients), discount))
+            for _ in range(rnd.randint(1, max_lines)):
+                product = rnd.randrange(products)
+                detail_rows.append((order_id, product_base + product + 1, rnd.randint(1, 10), prices[product]))
+        conn.executemany("INSERT INTO orders (id, order_date, client_id, discount) VALUES (?, ?, ?, ?)",
+                         order_rows)
+        conn.executemany("""INSERT INTO order_details (order_id, product_id, quantity, price)
+                            VALUES (?, ?, ?, ?)""", detail_rows)
+    conn.commit()
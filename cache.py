@@ -0,0 +1,82 @@
+"""
+Модуль cache.py
+Содержит ограниченный по размеру кэш LRU со счётчиками попаданий и промахов.
+"""
+
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Кэш ограниченного размера с вытеснением давно не использованных записей.
+
+    Помимо записей по ключу хранит признак complete: True означает, что в кэше
+    лежат все строки таблицы и полный список можно отдать без запроса к базе.
+    Признак сбрасывается при вытеснении и очистке.
+
+    Parameters
+    ----------
+    maxsize : int
+        Максимальное количество записей.
+    """
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.complete = False
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        """
+        Возвращает значение по ключу и отмечает его как недавно использованное.
+
+        Parameters
+        ----------
+        key : hashable
+            Ключ записи.
+
+        Returns
+        -------
+        object or None
+            Значение или None, если ключа нет в кэше.
+        """
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Добавляет запись, вытесняя самую старую при превышении maxsize."""
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.complete = False
+
+    def values(self):
+        """Возвращает список всех значений кэша."""
+        return list(self._data.values())
+
+    def clear(self):
+        """Удаляет все записи; счётчики попаданий и промахов сохраняются."""
+        self._data.clear()
+        self.complete = False
+
+    def stats(self):
+        """
+        Возвращает статистику использования кэша.
+
+        Returns
+        -------
+        dict
+            Ключи 'hits', 'misses', 'size', 'maxsize'.
+        """
+        return {"hits": self.hits, "misses": self.misses,
+                "size": len(self._data), "maxsize": self.maxsize}
@@ -0,0 +1,281 @@
+"""
+Модуль cli.py
+Консольная точка входа для пакетных операций без графического интерфейса:
+импорт и экспорт клиентов, отчёты и перестроение сводных таблиц. Модуль не
+импортирует tkinter, поэтому подходит для запуска из cron на серверах без
+дисплея.
+
+Примеры:
+    python cli.py import-clients clients.csv --rejected rejected.csv
+    python cli.py import-clients part1.jsonl part2.jsonl part3.csv --workers 4
+    python cli.py import-clients clients.jsonl --upsert
+    python cli.py export-clients clients.jsonl
+    python cli.py report top-clients --limit 10
+    python cli.py report daily --from 2024-01-01 --to 2024-02-01 --csv
+    python cli.py report orders-over-time --from 2024-01-01 --output orders.png
+    python cli.py rebuild-stats
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+from db import Database, PROFILES, IMPORT_CHUNK_SIZE, EXPORT_CHUNK_SIZE, CLIENT_FILE_FORMATS
+from instrumentation import format_stats
+
+# Шаг вывода прогресса (в строках), когда stderr не является терминалом.
+PROGRESS_EVERY = 100000
+
+
+class Progress:
+    """
+    Выводит прогресс длительной операции в stderr.
+
+    В терминале строка обновляется на месте, а при выводе в файл (cron)
+    печатается отдельная строка каждые every обработанных строк.
+
+    Parameters
+    ----------
+    label : str
+        Название операции.
+    every : int
+        Шаг вывода при записи не в терминал.
+    quiet : bool
+        Если True, выводится только итоговая строка.
+    """
+    def __init__(self, label, every=PROGRESS_EVERY, quiet=False):
+        self.label = label
+        self.every = every
+        self.quiet = quiet
+        self.interactive = sys.stderr.isatty()
+        self.count = 0
+        self.started = time.perf_counter()
+        self._next = every
+
+    def __call__(self, count):
+        self.count = count
+        if self.quiet:
+            return
+        if self.interactive:
+            sys.stderr.write(f"\r{self.label}: {count} строк ({self._rate():,.0f} строк/с)")
+            sys.stderr.flush()
+        elif count >= self._next:
+            print(f"{self.label}: {count} строк", file=sys.stderr, flush=True)
+            self._next = (count // self.every + 1) * self.every
+
+    def finish(self, count=None):
+        """Выводит итог операции."""
+        if count is not None:
+            self.count = count
+        if self.interactive and not self.quiet:
+            sys.stderr.write("\n")
+        elapsed = time.perf_counter() - self.started
+        print(f"{self.label}: {self.count} строк за {elapsed:.1f} с ({self._rate():,.0f} строк/с)",
+              file=sys.stderr, flush=True)
+
+    def _rate(self):
+        elapsed = time.perf_counter() - self.started
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+
+def file_format(path, explicit=None):
+    """Определяет формат файла по явному значению или расширению."""
+    if explicit:
+        return explicit
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in CLIENT_FILE_FORMATS:
+        raise SystemExit(f"Не удалось определить формат файла {path}, укажите --format")
+    return CLIENT_FILE_FORMATS[extension]
+
+
+def write_rows(header, rows, as_csv):
+    """Печатает строки отчёта в stdout таблицей или в формате CSV."""
+    if as_csv:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(header)
+        writer.writerows(rows)
+        return
+    print("\t".join(header))
+    for row in rows:
+        print("\t".join(f"{value:.2f}" if isinstance(value, float) else str(value) for value in row))
+
+
+def cmd_import_clients(db, args):
+    """
+    Импортирует клиентов из CSV, JSON или JSON Lines.
+
+    Несколько файлов или --workers больше 1 включают параллельный разбор
+    в пуле процессов (Database.import_clients_files); формат тогда
+    определяется по расширению каждого файла. --upsert обновляет
+    существующих клиентов вместо добавления дубликатов.
+    """
+    progress = Progress("Импорт", quiet=args.quiet)
+    options = {"chunk_size": args.chunk_size, "single_transaction": args.single_transaction,
+               "validate": not args.no_validate, "progress": progress}
+    parallel = len(args.files) > 1 or (args.workers or 0) > 1
+    if parallel:
+        if args.format:
+            raise SystemExit("--format нельзя указать при параллельном импорте, формат определяется по расширению")
+        if args.upsert:
+            raise SystemExit("--upsert поддерживается только при импорте одного файла")
+    else:
+        file_type = file_format(args.files[0], args.format)
+        options["upsert"] = args.upsert
+    try:
+        if parallel:
+            imported, rejected = db.import_clients_files(args.files, workers=args.workers, **options)
+        else:
+            path = args.files[0]
+            if file_type == "csv":
+                imported, rejected = db.import_clients_csv(path, **options)
+            else:
+                imported, rejected = db.import_clients_json(path, json_lines=file_type == "jsonl", **options)
+            rejected = [(path, number, row, reason) for number, row, reason in rejected]
+    except (OSError, ValueError) as e:
+        progress.finish()
+        partial = progress.count and not args.single_transaction
+        committed = " Уже зафиксированные порции остались в базе." if partial else ""
+        print(f"Импорт прерван: {e}.{committed}", file=sys.stderr)
+        return 1
+    progress.finish()
+    if isinstance(imported, dict):
+        print(f"Добавлено клиентов: {imported['inserted']}, обновлено: {imported['updated']}, "
+              f"без изменений: {imported['unchanged']}, отклонено строк: {len(rejected)}")
+    else:
+        print(f"Добавлено клиентов: {imported}, отклонено строк: {len(rejected)}")
+    if rejected and args.rejected:
+        with open(args.rejected, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["file", "row", "reason", "data"])
+            for path, number, row, reason in rejected:
+                writer.writerow([path, number, reason, json.dumps(row, ensure_ascii=False)])
+        print(f"Отклонённые строки записаны в {args.rejected}")
+    return 0
+
+
+def cmd_export_clients(db, args):
+    """Экспортирует клиентов в CSV, JSON или JSON Lines."""
+    file_type = file_format(args.file, args.format)
+    progress = Progress("Экспорт", quiet=args.quiet)
+    try:
+        if file_type == "csv":
+            db.export_clients_csv(args.file, chunk_size=args.chunk_size, progress=progress)
+        else:
+            db.export_clients_json(args.file, json_lines=file_type == "jsonl", chunk_size=args.chunk_size,
+                                   progress=progress)
+    except (OSError, sqlite3.Error) as e:
+        progress.finish()
+        print(f"Экспорт прерван: {e}. Файл {args.file} не записан или записан не полностью.", file=sys.stderr)
+        return 1
+    progress.finish()
+    return 0
+
+
+def cmd_report(db, args):
+    """Строит отчёт по сводным таблицам или функциям analysis."""
+    if args.report == "top-clients":
+        write_rows(("client_id", "name", "orders", "revenue"), db.get_top_clients(args.limit), args.csv)
+    elif args.report == "client-revenue":
+        write_rows(("client_id", "name", "orders", "revenue"),
+                   db.get_client_revenue(args.date_from, args.date_to, args.limit), args.csv)
+    elif args.report == "daily":
+        write_rows(("day", "orders", "revenue"), db.get_daily_order_stats(args.date_from, args.date_to), args.csv)
+    else:
+        if not args.output:
+            raise SystemExit(f"Для отчёта {args.report} нужен параметр --output")
+        # Зависимости analysis загружаются только для графических отчётов.
+        import analysis
+        if args.report == "orders-over-time":
+            analysis.orders_over_time(db, output=args.output, date_from=args.date_from, date_to=args.date_to)
+        else:
+            orders_df = analysis.load_orders_df(db, args.date_from, args.date_to)
+            analysis.build_client_graph(orders_df, output=args.output,
+                                        max_product_clients=args.max_product_clients)
+        print(f"График сохранён в {args.output}")
+    return 0
+
+
+def cmd_rebuild_stats(db, args):
+    """Перестраивает сводные таблицы заказов и поисковый индекс."""
+    started = time.perf_counter()
+    db.rebuild_order_stats()
+    db.rebuild_search_index()
+    print(f"Сводные таблицы и поисковый индекс перестроены за {time.perf_counter() - started:.1f} с")
+    return 0
+
+
+def build_parser():
+    """Создаёт парсер аргументов командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="shop.db", help="файл базы данных (по умолчанию shop.db)")
+    parser.add_argument("--profile", default="performance", choices=sorted(PROFILES),
+                        help="профиль настроек SQLite (по умолчанию performance)")
+    parser.add_argument("--stats", action="store_true", help="вывести статистику запросов после выполнения")
+    parser.add_argument("--quiet", action="store_true", help="не выводить промежуточный прогресс")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("import-clients", help="импорт клиентов из файлов")
+    command.add_argument("files", nargs="+", metavar="file")
+    command.add_argument("--format", choices=("csv", "json", "jsonl"))
+    command.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    command.add_argument("--workers", type=int,
+                         help="количество процессов разбора (по умолчанию число ядер при нескольких файлах)")
+    command.add_argument("--single-transaction", action="store_true",
+                         help="импортировать всё одной транзакцией (откат целиком при ошибке)")
+    command.add_argument("--no-validate", action="store_true", help="не проверять телефон и email")
+    command.add_argument("--upsert", action="store_true",
+                         help="обновлять клиентов с тем же email (или телефоном) вместо добавления дубликатов")
+    command.add_argument("--rejected", help="CSV-файл для отклонённых строк")
+    command.set_defaults(func=cmd_import_clients)
+
+    command = commands.add_parser("export-clients", help="экспорт клиентов в файл")
+    command.add_argument("file")
+    command.add_argument("--format", choices=("csv", "json", "jsonl"))
+    command.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+    command.set_defaults(func=cmd_export_clients)
+
+    command = commands.add_parser("report", help="отчёты по заказам")
+    command.add_argument("report", choices=("top-clients", "client-revenue", "daily",
+                                            "orders-over-time", "client-graph"))
+    command.add_argument("--limit", type=int, default=5)
+    command.add_argument("--from", dest="date_from", help="начало периода YYYY-MM-DD (включительно)")
+    command.add_argument("--to", dest="date_to", help="конец периода YYYY-MM-DD (не включительно)")
+    command.add_argument("--csv", action="store_true", help="вывести таблицу в формате CSV")
+    command.add_argument("--output", help="файл изображения для графических отчётов")
+    command.add_argument("--max-product-clients", type=int,
+                         help="пропускать товары, купленные большим числом клиентов (граф)")
+    command.set_defaults(func=cmd_report)
+
+    command = commands.add_parser("rebuild-stats", help="перестроить сводные таблицы и поисковый индекс")
+    command.set_defaults(func=cmd_rebuild_stats)
+    return parser
+
+
+def main(argv=None):
+    """
+    Разбирает аргументы и выполняет команду.
+
+    Returns
+    -------
+    int
+        Код завершения процесса.
+    """
+    args = build_parser().parse_args(argv)
+    db = Database(args.db, profile=args.profile, instrument=args.stats)
+    try:
+        code = args.func(db, args)
+    except KeyboardInterrupt:
+        print("\nПрервано пользователем", file=sys.stderr)
+        code = 130
+    finally:
+        if args.stats:
+            print(format_stats(db.stats_snapshot()), file=sys.stderr)
+        db.conn.close()
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
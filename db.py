@@ -1,236 +1,1959 @@
-""" Модуль db.py Содержит класс Database для работы с SQLite, а также для импорта/экспорта данных в CSV и JSON. """
+"""
+Модуль db.py
+Содержит класс Database для работы с SQLite, а также для импорта/экспорта данных в CSV и JSON.
+"""
 
-import sqlite3 import csv import json from datetime import datetime from models import Client, Product, Order, SpecialOrder
+import sqlite3
+import csv
+import io
+import json
+import os
+import re
+from collections import deque
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from cache import LRUCache
+from instrumentation import InstrumentedConnection, QueryStats, SLOW_QUERY_MS
+from models import Client, Product, Order, SpecialOrder, validate_contacts
 
-class Database: """ Класс для работы с базой SQLite и файловыми форматами.
+# Количество строк, вставляемых за один вызов executemany при импорте.
+IMPORT_CHUNK_SIZE = 1000
+# Количество строк, читаемых из курсора за один вызов fetchmany при экспорте.
+EXPORT_CHUNK_SIZE = 1000
+# Примерный размер части файла JSON Lines, разбираемой одним процессом
+# при параллельном импорте.
+PARALLEL_SPLIT_BYTES = 8 * 2 ** 20
+# Форматы файлов клиентов по расширению.
+CLIENT_FILE_FORMATS = {".csv": "csv", ".json": "json", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+# Размер страницы по умолчанию для постраничных запросов.
+PAGE_SIZE = 100
+# Максимальное количество клиентов и товаров в кэше объектов Database.
+CACHE_SIZE = 10000
+# Количество результатов полнотекстового поиска по умолчанию.
+SEARCH_LIMIT = 20
+# Количество совпадений, среди которых выбираются наиболее релевантные;
+# ограничивает время поиска по очень частым словам.
+SEARCH_CANDIDATES = 1000
 
-Parameters
-----------
-db_name : str
-    Имя файла базы данных.
-"""
-def __init__(self, db_name="shop.db"):
-    self.conn = sqlite3.connect(db_name)
-    self.create_tables()
-
-def create_tables(self):
-    """Создаёт таблицы clients, products, orders, order_details, если они отсутствуют."""
-    cursor = self.conn.cursor()
-    try:
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS clients (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                phone TEXT,
-                email TEXT
-            )
-        """)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS products (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                description TEXT,
-                price REAL NOT NULL
-            )
-        """)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS orders (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                order_date TEXT NOT NULL,
-                client_id INTEGER,
-                discount REAL DEFAULT 0,
-                FOREIGN KEY(client_id) REFERENCES clients(id)
-            )
-        """)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS order_details (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                order_id INTEGER,
-                product_id INTEGER,
-                quantity INTEGER,
-                price REAL,
-                FOREIGN KEY(order_id) REFERENCES orders(id),
-                FOREIGN KEY(product_id) REFERENCES products(id)
-            )
-        """)
-        self.conn.commit()
-    except sqlite3.Error as e:
-        print("Ошибка при создании таблиц:", e)
+# Версия схемы, хранимая в PRAGMA user_version; увеличивается при изменениях,
+# которые нужно применить к уже существующим файлам базы.
+SCHEMA_VERSION = 4
 
-def add_client(self, client):
-    """
-    Добавляет объект Client в базу данных.
+# Индексы для соединений заказов с клиентами и деталями, выборок по дате
+# и поиска клиентов/товаров по префиксу имени.
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_orders_client_id ON orders(client_id)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_order_date ON orders(order_date)",
+    "CREATE INDEX IF NOT EXISTS idx_order_details_order_id ON order_details(order_id)",
+    "CREATE INDEX IF NOT EXISTS idx_order_details_product_id ON order_details(product_id)",
+    "CREATE INDEX IF NOT EXISTS idx_clients_name ON clients(name)",
+    "CREATE INDEX IF NOT EXISTS idx_products_name ON products(name)",
+    "CREATE INDEX IF NOT EXISTS idx_client_order_stats_count ON client_order_stats(orders_count)",
+]
+
+# Полнотекстовые индексы FTS5 по клиентам и товарам. Индексы хранят только
+# токены (content=...), а сами строки читаются из базовых таблиц. Новые
+# строки добавляются в индекс пакетно после отметки search_index_state
+# (см. refresh_search_index), а триггеры переносят в индекс изменения и
+# удаления уже проиндексированных строк.
+FTS_SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS clients_fts USING fts5(
+           name, phone, email, content='clients', content_rowid='id',
+           tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER IF NOT EXISTS clients_fts_delete AFTER DELETE ON clients
+       WHEN old.id <= (SELECT last_client_id FROM search_index_state) BEGIN
+           INSERT INTO clients_fts (clients_fts, rowid, name, phone, email)
+           VALUES ('delete', old.id, old.name, old.phone, old.email);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS clients_fts_update AFTER UPDATE OF name, phone, email ON clients
+       WHEN old.id <= (SELECT last_client_id FROM search_index_state) BEGIN
+           INSERT INTO clients_fts (clients_fts, rowid, name, phone, email)
+           VALUES ('delete', old.id, old.name, old.phone, old.email);
+           INSERT INTO clients_fts (rowid, name, phone, email) VALUES (new.id, new.name, new.phone, new.email);
+       END""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+           name, description, content='products', content_rowid='id',
+           tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products
+       WHEN old.id <= (SELECT last_product_id FROM search_index_state) BEGIN
+           INSERT INTO products_fts (products_fts, rowid, name, description)
+           VALUES ('delete', old.id, old.name, old.description);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE OF name, description ON products
+       WHEN old.id <= (SELECT last_product_id FROM search_index_state) BEGIN
+           INSERT INTO products_fts (products_fts, rowid, name, description)
+           VALUES ('delete', old.id, old.name, old.description);
+           INSERT INTO products_fts (rowid, name, description) VALUES (new.id, new.name, new.description);
+       END""",
+]
+
+# Ключ сопоставления клиентов при импорте с обновлением (upsert_clients):
+# email в нижнем регистре, а если email пуст — телефон без пробелов,
+# дефисов, скобок и знака "+". Клиенты без email и телефона ключа не имеют.
+CONTACT_KEY_SQL = """CASE
+    WHEN TRIM(COALESCE(email, '')) <> '' THEN 'email:' || LOWER(TRIM(email))
+    WHEN TRIM(COALESCE(phone, '')) <> '' THEN 'phone:' || REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(
+        TRIM(phone), ' ', ''), '-', ''), '(', ''), ')', ''), '+', '')
+END"""
+
+# Профили настройки соединения SQLite (значения PRAGMA).
+# "default" оставляет настройки SQLite по умолчанию (журнал отката,
+# synchronous=FULL). "performance" включает WAL, при котором читатели не
+# блокируются писателем, и ослабляет синхронизацию до NORMAL: после сбоя
+# питания могут потеряться последние транзакции, но база останется целостной.
+PROFILES = {
+    "default": {},
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,  # Около 64 МБ (отрицательное значение — в КиБ)
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+}
+
+# Необязательные индексы для поиска клиента по контактам.
+CONTACT_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_clients_email ON clients(email)",
+    "CREATE INDEX IF NOT EXISTS idx_clients_phone ON clients(phone)",
+]
+
+
+def _chunked(iterable, size):
+    """Разбивает итерируемый объект на списки длиной не более size."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
 
-    Parameters
-    ----------
-    client : Client
-        Объект клиента.
-    """
-    cursor = self.conn.cursor()
-    try:
-        cursor.execute("INSERT INTO clients (name, phone, email) VALUES (?, ?, ?)",
-                       (client.name, client.phone, client.email))
-        self.conn.commit()
-        client.id = cursor.lastrowid
-    except sqlite3.Error as e:
-        print("Ошибка при добавлении клиента:", e)
 
-def get_clients(self):
+def _order_totals_query(date_from=None, date_to=None, client_id=None, order_id=None, id_range=None):
     """
-    Извлекает всех клиентов из базы.
+    Формирует подзапрос со стоимостью каждого заказа с учётом скидки.
 
     Returns
     -------
-    list of Client
-        Список клиентов в виде объектов Client.
+    tuple(str, list)
+        Текст запроса со столбцами (order_id, client_id, day, total) и параметры.
     """
-    cursor = self.conn.cursor()
-    cursor.execute("SELECT id, name, phone, email FROM clients")
-    rows = cursor.fetchall()
-    return [Client(name=row[1], phone=row[2], email=row[3], id=row[0]) for row in rows]
+    conditions, params = _order_conditions(date_from, date_to, client_id, order_id, id_range)
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    query = f"""
+        SELECT orders.id AS order_id, orders.client_id AS client_id,
+               substr(orders.order_date, 1, 10) AS day,
+               COALESCE(SUM(order_details.price * order_details.quantity), 0)
+                   * (1 - COALESCE(orders.discount, 0) / 100.0) AS total
+        FROM orders
+        LEFT JOIN order_details ON order_details.order_id = orders.id
+        {where}
+        GROUP BY orders.id
+    """
+    return query, params
+
+
+def _iter_pages(get_page, chunk_size, key, filters):
+    """Перебирает элементы, последовательно запрашивая страницы get_page."""
+    after_id = None
+    while True:
+        page = get_page(limit=chunk_size, after_id=after_id, **filters)
+        yield from page
+        if len(page) < chunk_size:
+            break
+        after_id = key(page[-1])
+
+
+class _MalformedJSON(str):
+    """Строка JSON Lines, которую не удалось разобрать; отклоняется при импорте."""
+
 
-def add_product(self, product):
+# Пустая строка JSON Lines: занимает номер строки файла, но не импортируется.
+_BLANK_LINE = object()
+
+
+def _parse_json_lines(lines):
     """
-    Добавляет объект Product в базу данных.
+    Разбирает строки JSON Lines по одной на каждую строку файла.
 
-    Parameters
-    ----------
-    product : Product
-        Объект товара.
+    Пустые строки возвращаются как _BLANK_LINE, чтобы номера строк импорта
+    совпадали с номерами строк файла. Некорректная строка не прерывает
+    импорт, а возвращается как _MalformedJSON и попадает в отклонённые
+    строки с причиной "некорректный JSON".
     """
-    cursor = self.conn.cursor()
-    try:
-        cursor.execute("INSERT INTO products (name, description, price) VALUES (?, ?, ?)",
-                       (product.name, product.description, product.price))
-        self.conn.commit()
-        product.id = cursor.lastrowid
-    except sqlite3.Error as e:
-        print("Ошибка при добавлении товара:", e)
+    for line in lines:
+        if not line.strip():
+            yield _BLANK_LINE
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield _MalformedJSON(line.rstrip("\r\n"))
+
 
-def get_products(self):
+def _prepare_client_rows(chunk, validate=True):
     """
-    Извлекает все товары из базы.
+    Проверяет порцию строк импорта клиентов.
+
+    Телефоны и email всей порции проверяются одним вызовом validate_contacts.
+
+    Parameters
+    ----------
+    chunk : list of tuple
+        Пары (номер строки, словарь с ключами 'name', 'phone', 'email').
+    validate : bool
+        Проверять ли телефон и email.
 
     Returns
     -------
-    list of Product
-        Список товаров в виде объектов Product.
+    tuple(list of tuple, list of tuple)
+        Строки (name, phone, email) для вставки и отклонённые строки
+        в виде кортежей (номер строки, данные, причина).
     """
-    cursor = self.conn.cursor()
-    cursor.execute("SELECT id, name, description, price FROM products")
-    rows = cursor.fetchall()
-    return [Product(name=row[1], description=row[2], price=row[3], id=row[0]) for row in rows]
+    candidates = []
+    rejected = []
+    for number, row in chunk:
+        if row is _BLANK_LINE:
+            continue
+        if isinstance(row, _MalformedJSON):
+            rejected.append((number, str(row), "некорректный JSON"))
+            continue
+        if not isinstance(row, Mapping):
+            rejected.append((number, row, "строка не является объектом"))
+            continue
+        try:
+            values = (row["name"], row["phone"], row["email"])
+        except KeyError as e:
+            rejected.append((number, row, f"отсутствует поле {e}"))
+            continue
+        if not values[0]:
+            rejected.append((number, row, "пустое имя"))
+            continue
+        candidates.append((number, row, values))
+    if not validate:
+        return [values for _, _, values in candidates], rejected
+    reasons = validate_contacts([values[1] for _, _, values in candidates],
+                                [values[2] for _, _, values in candidates])
+    batch = []
+    for (number, row, values), reason in zip(candidates, reasons):
+        if reason is None:
+            batch.append(values)
+        else:
+            rejected.append((number, row, reason))
+    rejected.sort(key=lambda item: item[0])
+    return batch, rejected
 
-def add_order(self, order):
+
+def _fts_query(text):
     """
-    Добавляет заказ (Order или SpecialOrder) и его детали в базу.
+    Преобразует введённый текст в запрос FTS5.
+
+    Слова ищутся целиком, а последнее — как префикс, поскольку его
+    обычно ещё дописывают. Спецсимволы синтаксиса FTS5 отбрасываются.
+    Возвращает None, если в тексте нет слов.
+    """
+    terms = re.findall(r"[^\W_]+", text)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"' for term in terms[:-1]) + f' "{terms[-1]}"*'
 
-    Parameters
-    ----------
-    order : Order or SpecialOrder
-        Объект заказа.
-    """
-    cursor = self.conn.cursor()
-    try:
-        discount = getattr(order, "discount", 0)
-        cursor.execute("INSERT INTO orders (order_date, client_id, discount) VALUES (?, ?, ?)",
-                       (order.order_date, order.client.id, discount))
-        self.conn.commit()
-        order.id = cursor.lastrowid
-        for product, qty in order.products:
-            cursor.execute("""INSERT INTO order_details (order_id, product_id, quantity, price)
-                              VALUES (?, ?, ?, ?)""",
-                           (order.id, product.id, qty, product.price))
-        self.conn.commit()
-    except sqlite3.Error as e:
-        print("Ошибка при добавлении заказа:", e)
 
-def get_orders(self):
+def _client_file_tasks(paths, split_bytes=PARALLEL_SPLIT_BYTES):
     """
-    Извлекает заказы, соединяя информацию о клиенте.
+    Разбивает файлы клиентов на задачи для процессов параллельного импорта.
+
+    Файлы CSV и JSON Lines делятся на части около split_bytes по границам
+    записей (в CSV перевод строки внутри кавычек границей не считается),
+    поэтому память процесса ограничена размером части. Файл JSON (массив)
+    нельзя разобрать по частям, он читается целиком одной задачей.
 
     Returns
     -------
     list of tuple
-        Кортеж (order_id, order_date, client_name, discount) для каждого заказа.
+        Задачи (путь, формат, начальный байт, конечный байт или None,
+        заголовок CSV для частей после первой).
+
+    Raises
+    ------
+    ValueError
+        Если какой-либо файл не существует, не читается или имеет
+        неизвестное расширение; в сообщении перечислены все такие файлы,
+        и ни одна задача не создаётся.
     """
-    cursor = self.conn.cursor()
-    cursor.execute("""
-        SELECT orders.id, orders.order_date, clients.name, orders.discount
-        FROM orders
-        LEFT JOIN clients ON orders.client_id = clients.id
-    """)
-    return cursor.fetchall()
+    failures = []
+    headers = {}
+    for path in paths:
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in CLIENT_FILE_FORMATS:
+            failures.append(f"{path}: неизвестный формат файла")
+            continue
+        try:
+            with open(path, newline="", encoding="utf-8") as f:
+                if CLIENT_FILE_FORMATS[extension] == "csv":
+                    headers[path] = next(csv.reader(f), None)
+        except OSError as e:
+            failures.append(f"{path}: {e.strerror or e}")
+        except ValueError as e:
+            failures.append(f"{path}: {e}")
+    if failures:
+        raise ValueError("Не удалось открыть файлы импорта:\n  " + "\n  ".join(failures))
+    tasks = []
+    for path in paths:
+        file_type = CLIENT_FILE_FORMATS[os.path.splitext(path)[1].lower()]
+        if file_type == "json":
+            tasks.append((path, file_type, 0, None, None))
+            continue
+        with open(path, "rb") as f:
+            for start, end in _record_ranges(f, split_bytes, quoted=file_type == "csv"):
+                tasks.append((path, file_type, start, end, headers.get(path) if start else None))
+    return tasks
+
 
-def export_clients_csv(self, filepath):
+def _record_ranges(f, split_bytes, quoted=False):
     """
-    Экспортирует список клиентов в CSV-файл.
+    Делит двоичный файл f на диапазоны байтов [start, end) около split_bytes,
+    заканчивающиеся переводом строки.
 
-    Parameters
-    ----------
-    filepath : str
-        Путь к CSV файлу.
+    При quoted=True перевод строки считается границей, только если перед ним
+    чётное число кавычек, как в CSV: удвоенная кавычка внутри поля не меняет
+    чётность, а перевод строки внутри поля в кавычках не разрывает запись.
+    Кавычка посреди поля без кавычек (допустимая в диалекте excel) эту
+    проверку сбивает, такие файлы нужно импортировать последовательно.
     """
-    clients = self.get_clients()
-    try:
-        with open(filepath, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(["id", "name", "phone", "email"])
-            for client in clients:
-                writer.writerow([client.id, client.name, client.phone, client.email])
-    except Exception as e:
-        print("Ошибка экспорта CSV:", e)
+    size = os.fstat(f.fileno()).st_size
+    start = 0
+    while start < size:
+        end = min(start + split_bytes, size)
+        quotes = _count_bytes(f, start, end, b'"') if quoted else 0
+        f.seek(end)
+        while True:
+            line = f.readline()
+            if not line or not quoted:
+                break
+            quotes += line.count(b'"')
+            if quotes % 2 == 0:
+                break
+        end = f.tell()
+        yield start, end
+        start = end
+
 
-def export_clients_json(self, filepath):
+def _count_bytes(f, start, end, byte, block_size=2 ** 20):
+    """Считает вхождения byte в байтах [start, end) двоичного файла f."""
+    f.seek(start)
+    count = 0
+    while start < end:
+        block = f.read(min(block_size, end - start))
+        count += block.count(byte)
+        start += len(block)
+    return count
+
+
+def _read_client_task(task, chunk_size=IMPORT_CHUNK_SIZE, validate=True):
     """
-    Экспортирует список клиентов в JSON-файл.
+    Читает и проверяет часть файла клиентов; выполняется в процессе пула.
 
     Parameters
     ----------
-    filepath : str
-        Путь к JSON файлу.
+    task : tuple
+        Задача из _client_file_tasks.
+    chunk_size : int
+        Количество строк в одной порции результата.
+    validate : bool
+        Проверять ли телефон и email.
+
+    Returns
+    -------
+    list of tuple
+        Порции (строки (name, phone, email) для вставки, отклонённые строки
+        (номер строки в части, данные, причина), количество прочитанных
+        строк). Строки нумеруются с 1 от начала части: строки JSON Lines —
+        по строкам файла, строки CSV — по записям после заголовка.
     """
-    clients = self.get_clients()
-    clients_data = [{"id": client.id, "name": client.name,
-                     "phone": client.phone, "email": client.email} for client in clients]
-    try:
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(clients_data, f, ensure_ascii=False, indent=4)
-    except Exception as e:
-        print("Ошибка экспорта JSON:", e)
+    path, file_type, start, end, fieldnames = task
+    if file_type == "json":
+        with open(path, encoding="utf-8") as f:
+            rows = json.load(f)
+        return list(_prepared_client_chunks(rows, chunk_size, validate))
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    if file_type == "csv":
+        rows = csv.DictReader(io.StringIO(text, newline=""), fieldnames=fieldnames)
+    else:
+        lines = text.split("\n")
+        if not lines[-1]:
+            lines.pop()  # Пустой остаток после завершающего перевода строки
+        rows = _parse_json_lines(lines)
+    return list(_prepared_client_chunks(rows, chunk_size, validate))
 
-def import_clients_csv(self, filepath):
+
+def _prepared_client_chunks(rows, chunk_size, validate=True):
     """
-    Импортирует клиентов из CSV-файла.
+    Разбивает строки импорта на порции и проверяет их.
 
-    Parameters
-    ----------
-    filepath : str
-        Путь к CSV файлу.
+    Yields
+    ------
+    tuple(list of tuple, list of tuple, int)
+        Строки для вставки, отклонённые строки (номер строки, данные,
+        причина) и количество строк порции.
     """
-    try:
-        with open(filepath, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                client = Client(name=row["name"], phone=row["phone"], email=row["email"])
-                self.add_client(client)
-    except Exception as e:
-        print("Ошибка импорта CSV:", e)
+    for chunk in _chunked(enumerate(rows, start=1), chunk_size):
+        batch, rejected = _prepare_client_rows(chunk, validate)
+        yield batch, rejected, len(chunk)
+
+
+def _prefix_conditions(column, prefix):
+    """
+    Формирует условие поиска по префиксу строки в виде диапазона,
+    который SQLite может обслужить индексом по столбцу.
+    """
+    return [f"{column} >= ?", f"{column} < ?"], [prefix, prefix + "\U0010ffff"]
+
+
+def _order_conditions(date_from=None, date_to=None, client_id=None, order_id=None, id_range=None):
+    """
+    Формирует условия отбора заказов по дате (date_to не включительно), клиенту,
+    номеру и диапазону номеров id_range = (после, до включительно).
+    """
+    conditions, params = [], []
+    if date_from is not None:
+        conditions.append("orders.order_date >= ?")
+        params.append(date_from)
+    if date_to is not None:
+        conditions.append("orders.order_date < ?")
+        params.append(date_to)
+    if client_id is not None:
+        conditions.append("orders.client_id = ?")
+        params.append(client_id)
+    if order_id is not None:
+        conditions.append("orders.id = ?")
+        params.append(order_id)
+    if id_range is not None:
+        conditions.append("orders.id > ? AND orders.id <= ?")
+        params.extend(id_range)
+    return conditions, params
+
 
-def import_clients_json(self, filepath):
+class Database:
     """
-    Импортирует клиентов из JSON-файла.
+    Класс для работы с базой SQLite и файловыми форматами.
 
     Parameters
     ----------
-    filepath : str
-        Путь к JSON файлу.
+    db_name : str
+        Имя файла базы данных.
+    contact_indexes : bool
+        Создавать ли индексы по email и телефону клиентов.
+    profile : str or dict
+        Имя профиля из PROFILES или словарь значений PRAGMA.
+    cache_size : int
+        Максимальное количество клиентов и товаров (каждых) в кэше объектов.
+    instrument : bool
+        Собирать ли статистику запросов (см. stats_snapshot). Без неё
+        используется обычное соединение без накладных расходов.
+    slow_query_ms : float
+        Порог времени оператора, начиная с которого он попадает в журнал
+        медленных запросов вместе с EXPLAIN QUERY PLAN.
     """
-    try:
+    def __init__(self, db_name="shop.db", contact_indexes=False, profile="default", cache_size=CACHE_SIZE,
+                 instrument=False, slow_query_ms=SLOW_QUERY_MS):
+        self.db_name = db_name
+        self.contact_indexes = contact_indexes
+        self.profile = profile
+        self.client_cache = LRUCache(cache_size)
+        self.product_cache = LRUCache(cache_size)
+        self._data_version = None
+        self.stats = None
+        if instrument:
+            self.stats = QueryStats(slow_query_ms)
+            self.conn = sqlite3.connect(db_name, factory=InstrumentedConnection)
+            self.conn.stats = self.stats
+            self.conn.set_trace_callback(self.stats.trace)
+            # Обёртки на экземпляре замеряют каждый публичный метод, включая
+            # вложенные вызовы через self.
+            for name, method in vars(Database).items():
+                if callable(method) and not name.startswith("_") and name != "stats_snapshot":
+                    setattr(self, name, self.stats.wrap(name, getattr(self, name)))
+        else:
+            self.conn = sqlite3.connect(db_name)
+        self.configure(profile)
+        self.create_tables()
+
+    def configure(self, profile):
+        """
+        Применяет к соединению профиль настроек SQLite.
+
+        Parameters
+        ----------
+        profile : str or dict
+            Имя профиля из PROFILES или словарь {имя PRAGMA: значение}.
+        """
+        pragmas = PROFILES[profile] if isinstance(profile, str) else profile
+        cursor = self.conn.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+    def create_tables(self):
+        """Создаёт таблицы clients, products, orders, order_details, если они отсутствуют."""
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS clients (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    phone TEXT,
+                    email TEXT,
+                    contact_key TEXT
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS products (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    description TEXT,
+                    price REAL NOT NULL
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS orders (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    order_date TEXT NOT NULL,
+                    client_id INTEGER,
+                    discount REAL DEFAULT 0,
+                    FOREIGN KEY(client_id) REFERENCES clients(id)
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS order_details (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    order_id INTEGER,
+                    product_id INTEGER,
+                    quantity INTEGER,
+                    price REAL,
+                    FOREIGN KEY(order_id) REFERENCES orders(id),
+                    FOREIGN KEY(product_id) REFERENCES products(id)
+                )
+            """)
+            # Сводные таблицы статистики заказов, см. refresh_order_stats.
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS client_order_stats (
+                    client_id INTEGER PRIMARY KEY,
+                    orders_count INTEGER NOT NULL,
+                    revenue REAL NOT NULL
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS daily_order_stats (
+                    day TEXT PRIMARY KEY,
+                    orders_count INTEGER NOT NULL,
+                    revenue REAL NOT NULL
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS order_stats_state (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    last_order_id INTEGER NOT NULL
+                )
+            """)
+            # Отметка полнотекстовых индексов, см. refresh_search_index.
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS search_index_state (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    last_client_id INTEGER NOT NULL,
+                    last_product_id INTEGER NOT NULL
+                )
+            """)
+            # Отметка ключей сопоставления клиентов, см. _refresh_contact_keys.
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS contact_key_state (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    last_client_id INTEGER NOT NULL
+                )
+            """)
+            self.conn.commit()
+            self.migrate()
+        except sqlite3.Error as e:
+            print("Ошибка при создании таблиц:", e)
+
+    def migrate(self):
+        """
+        Приводит схему существующей базы к текущей версии.
+
+        Создаёт отсутствующие индексы и после их первого построения
+        обновляет статистику планировщика (ANALYZE), при переходе на
+        версию 2 заполняет сводные таблицы статистики заказов, на
+        версию 3 — полнотекстовые индексы, а на версию 4 добавляет
+        клиентам ключ сопоставления contact_key с уникальным индексом.
+        Для большой базы первое открытие после обновления может занять
+        заметное время.
+        """
+        cursor = self.conn.cursor()
+        version = cursor.execute("PRAGMA user_version").fetchone()[0]
+        for statement in INDEXES + (CONTACT_INDEXES if self.contact_indexes else []) + FTS_SCHEMA:
+            cursor.execute(statement)
+        if version < 1:
+            cursor.execute("ANALYZE")
+        if version < 2:
+            self._rebuild_order_stats(cursor)
+        if version < 3:
+            self._rebuild_search_index(cursor)
+        if version < 4:
+            columns = [row[1] for row in cursor.execute("PRAGMA table_info(clients)")]
+            if "contact_key" not in columns:
+                cursor.execute("ALTER TABLE clients ADD COLUMN contact_key TEXT")
+            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_clients_contact_key ON clients(contact_key)")
+            self._refresh_contact_keys(cursor)
+        if version < SCHEMA_VERSION:
+            cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.commit()
+
+    def refresh_order_stats(self):
+        """
+        Дополняет сводные таблицы статистики заказами, добавленными после
+        последнего обновления.
+
+        Таблицы client_order_stats (заказы и выручка по клиентам) и
+        daily_order_stats (заказы и выручка по дням) обновляются
+        инкрементально: учитываются только заказы с id больше сохранённой
+        отметки order_stats_state.last_order_id. add_order и add_orders
+        вызывают обновление в своей транзакции; явный вызов нужен, только
+        если заказы добавлялись в обход этих методов. После удаления или
+        изменения заказов таблицы нужно перестроить rebuild_order_stats.
+        """
+        cursor = self.conn.cursor()
+        try:
+            self._refresh_order_stats(cursor)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            print("Ошибка при обновлении статистики заказов:", e)
+
+    def rebuild_order_stats(self):
+        """Полностью пересчитывает сводные таблицы статистики заказов."""
+        cursor = self.conn.cursor()
+        try:
+            self._rebuild_order_stats(cursor)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            print("Ошибка при пересчёте статистики заказов:", e)
+
+    def _rebuild_order_stats(self, cursor):
+        """Очищает сводные таблицы и заполняет их заново, не фиксируя транзакцию."""
+        cursor.execute("DELETE FROM client_order_stats")
+        cursor.execute("DELETE FROM daily_order_stats")
+        cursor.execute("DELETE FROM order_stats_state")
+        self._refresh_order_stats(cursor)
+
+    def _refresh_order_stats(self, cursor):
+        """Добавляет в сводные таблицы заказы после отметки, не фиксируя транзакцию."""
+        row = cursor.execute("SELECT last_order_id FROM order_stats_state WHERE id = 1").fetchone()
+        last_id = row[0] if row else 0
+        max_id = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM orders").fetchone()[0]
+        if max_id <= last_id:
+            return
+        query, params = _order_totals_query(id_range=(last_id, max_id))
+        # WHERE в SELECT обязателен: без него SQLite не разберёт ON CONFLICT.
+        cursor.execute(f"""
+            INSERT INTO client_order_stats (client_id, orders_count, revenue)
+            SELECT client_id, COUNT(*), SUM(total) FROM ({query})
+            WHERE client_id IS NOT NULL
+            GROUP BY client_id
+            ON CONFLICT(client_id) DO UPDATE SET
+                orders_count = orders_count + excluded.orders_count,
+                revenue = revenue + excluded.revenue
+        """, params)
+        cursor.execute(f"""
+            INSERT INTO daily_order_stats (day, orders_count, revenue)
+            SELECT day, COUNT(*), SUM(total) FROM ({query})
+            WHERE true
+            GROUP BY day
+            ON CONFLICT(day) DO UPDATE SET
+                orders_count = orders_count + excluded.orders_count,
+                revenue = revenue + excluded.revenue
+        """, params)
+        cursor.execute("INSERT OR REPLACE INTO order_stats_state (id, last_order_id) VALUES (1, ?)", (max_id,))
+
+    def refresh_search_index(self):
+        """
+        Добавляет в полнотекстовые индексы клиентов и товары, добавленные
+        после последнего обновления.
+
+        Новые строки индексируются одним запросом INSERT ... SELECT по
+        диапазону id после отметки search_index_state: построчные триггеры
+        на вставку с FTS5 работают в десятки раз медленнее при массовом
+        импорте. add_client, add_product и import_clients вызывают
+        обновление в своей транзакции, а методы поиска — перед запросом.
+        """
+        cursor = self.conn.cursor()
+        try:
+            self._refresh_search_index(cursor)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            print("Ошибка при обновлении поискового индекса:", e)
+
+    def rebuild_search_index(self):
+        """Полностью перестраивает полнотекстовые индексы клиентов и товаров."""
+        cursor = self.conn.cursor()
+        try:
+            self._rebuild_search_index(cursor)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            print("Ошибка при перестроении поискового индекса:", e)
+
+    def _rebuild_search_index(self, cursor):
+        """Заполняет полнотекстовые индексы заново, не фиксируя транзакцию."""
+        cursor.execute("INSERT INTO clients_fts (clients_fts) VALUES ('rebuild')")
+        cursor.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+        cursor.execute("""
+            INSERT OR REPLACE INTO search_index_state (id, last_client_id, last_product_id)
+            VALUES (1, (SELECT COALESCE(MAX(id), 0) FROM clients), (SELECT COALESCE(MAX(id), 0) FROM products))
+        """)
+
+    def _refresh_search_index(self, cursor):
+        """Добавляет в полнотекстовые индексы строки после отметки, не фиксируя транзакцию."""
+        row = cursor.execute("SELECT last_client_id, last_product_id FROM search_index_state WHERE id = 1").fetchone()
+        last_client_id, last_product_id = row if row else (0, 0)
+        max_client_id = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM clients").fetchone()[0]
+        max_product_id = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM products").fetchone()[0]
+        if max_client_id <= last_client_id and max_product_id <= last_product_id:
+            return
+        cursor.execute("""
+            INSERT INTO clients_fts (rowid, name, phone, email)
+            SELECT id, name, phone, email FROM clients WHERE id > ? AND id <= ?
+        """, (last_client_id, max_client_id))
+        cursor.execute("""
+            INSERT INTO products_fts (rowid, name, description)
+            SELECT id, name, description FROM products WHERE id > ? AND id <= ?
+        """, (last_product_id, max_product_id))
+        cursor.execute("INSERT OR REPLACE INTO search_index_state (id, last_client_id, last_product_id) VALUES (1, ?, ?)",
+                       (max(last_client_id, max_client_id), max(last_product_id, max_product_id)))
+
+    def _refresh_contact_keys(self, cursor):
+        """
+        Заполняет ключ contact_key клиентов после отметки, не фиксируя транзакцию.
+
+        add_client и import_clients ключ не заполняют, поэтому он назначается
+        пакетно перед импортом с обновлением. Если такой ключ уже есть у
+        другого клиента, строка остаётся без ключа (UPDATE OR IGNORE): при
+        существующих дубликатах сопоставляется клиент с наименьшим id.
+        """
+        row = cursor.execute("SELECT last_client_id FROM contact_key_state WHERE id = 1").fetchone()
+        last_id = row[0] if row else 0
+        max_id = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM clients").fetchone()[0]
+        if max_id <= last_id:
+            return
+        cursor.execute(f"""
+            UPDATE OR IGNORE clients SET contact_key = {CONTACT_KEY_SQL}
+            WHERE id > ? AND id <= ? AND contact_key IS NULL
+        """, (last_id, max_id))
+        cursor.execute("INSERT OR REPLACE INTO contact_key_state (id, last_client_id) VALUES (1, ?)", (max_id,))
+
+    def _catch_up(self, refresh, message):
+        """
+        Догоняет сводные таблицы или поисковый индекс перед чтением.
+
+        Вне транзакции обновление фиксируется сразу. Если у вызывающего
+        открыта транзакция, обновление выполняется в точке сохранения:
+        транзакция не фиксируется и не откатывается, а при ошибке
+        отменяется только само обновление.
+
+        Parameters
+        ----------
+        refresh : callable
+            Метод обновления, принимающий курсор, например _refresh_order_stats.
+        message : str
+            Текст, печатаемый перед ошибкой SQLite.
+        """
+        cursor = self.conn.cursor()
+        if not self.conn.in_transaction:
+            try:
+                refresh(cursor)
+                self.conn.commit()
+            except sqlite3.Error as e:
+                self.conn.rollback()
+                print(message, e)
+            return
+        cursor.execute("SAVEPOINT catch_up")
+        try:
+            refresh(cursor)
+        except sqlite3.Error as e:
+            cursor.execute("ROLLBACK TO catch_up")
+            print(message, e)
+        finally:
+            cursor.execute("RELEASE catch_up")
+
+    def get_top_clients(self, limit=5):
+        """
+        Возвращает клиентов с наибольшим числом заказов по сводной таблице.
+
+        Parameters
+        ----------
+        limit : int
+            Количество клиентов.
+
+        Returns
+        -------
+        list of tuple
+            Кортеж (client_id, client_name, orders_count, revenue)
+            по убыванию числа заказов.
+        """
+        self._catch_up(self._refresh_order_stats, "Ошибка при обновлении статистики заказов:")
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT client_order_stats.client_id, clients.name,
+                   client_order_stats.orders_count, client_order_stats.revenue
+            FROM client_order_stats
+            LEFT JOIN clients ON clients.id = client_order_stats.client_id
+            ORDER BY client_order_stats.orders_count DESC, client_order_stats.client_id
+            LIMIT ?
+        """, (limit,))
+        return cursor.fetchall()
+
+    def get_daily_order_stats(self, date_from=None, date_to=None):
+        """
+        Возвращает количество заказов и выручку по дням из сводной таблицы.
+
+        Parameters
+        ----------
+        date_from : str, optional
+            Первый день периода 'YYYY-MM-DD' (включительно).
+        date_to : str, optional
+            Последний день периода 'YYYY-MM-DD' (не включительно).
+
+        Returns
+        -------
+        list of tuple
+            Кортеж (date, orders_count, revenue) по возрастанию даты.
+        """
+        self._catch_up(self._refresh_order_stats, "Ошибка при обновлении статистики заказов:")
+        conditions, params = [], []
+        if date_from is not None:
+            conditions.append("day >= ?")
+            params.append(date_from)
+        if date_to is not None:
+            conditions.append("day < ?")
+            params.append(date_to)
+        query = "SELECT day, orders_count, revenue FROM daily_order_stats"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        cursor = self.conn.cursor()
+        cursor.execute(query + " ORDER BY day", params)
+        return cursor.fetchall()
+
+    def add_client(self, client):
+        """
+        Добавляет объект Client в базу данных.
+
+        Parameters
+        ----------
+        client : Client
+            Объект клиента.
+        """
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("INSERT INTO clients (name, phone, email) VALUES (?, ?, ?)",
+                           (client.name, client.phone, client.email))
+            # lastrowid читается до обновления поискового индекса: его
+            # INSERT в том же курсоре перезаписывают значение.
+            new_id = cursor.lastrowid
+            self._refresh_search_index(cursor)
+            self.conn.commit()
+            client.id = new_id
+            self.client_cache.clear()
+        except sqlite3.Error as e:
+            print("Ошибка при добавлении клиента:", e)
+
+    def get_clients(self):
+        """
+        Извлекает всех клиентов из базы.
+
+        Если все клиенты помещаются в кэш, список заполняет его и при
+        повторных вызовах возвращается из кэша без запроса к базе.
+
+        Returns
+        -------
+        list of Client
+            Список клиентов в виде объектов Client.
+        """
+        return self._get_all_cached(self.client_cache, "SELECT id, name, phone, email FROM clients",
+                                    lambda row: Client(name=row[1], phone=row[2], email=row[3], id=row[0]))
+
+    def get_client(self, client_id):
+        """
+        Возвращает клиента по идентификатору, используя кэш.
+
+        Parameters
+        ----------
+        client_id : int
+            Идентификатор клиента.
+
+        Returns
+        -------
+        Client or None
+            Клиент или None, если клиента с таким идентификатором нет.
+            Объект разделяется с кэшем, изменять его не следует.
+        """
+        return self._get_cached(self.client_cache, "SELECT id, name, phone, email FROM clients WHERE id = ?",
+                                client_id, lambda row: Client(name=row[1], phone=row[2], email=row[3], id=row[0]))
+
+    def get_clients_page(self, limit=PAGE_SIZE, after_id=None, name_prefix=None, descending=False, offset=0,
+                         by_name=False):
+        """
+        Извлекает страницу клиентов с пагинацией по ключу (keyset).
+
+        Parameters
+        ----------
+        limit : int
+            Максимальное количество клиентов на странице.
+        after_id : int, optional
+            Идентификатор последнего клиента предыдущей страницы.
+        name_prefix : str, optional
+            Префикс имени клиента.
+        descending : bool
+            Сортировать ли по убыванию идентификатора.
+        offset : int
+            Количество строк, пропускаемых после курсора; нужно только для
+            перехода в произвольное место, последовательный обход
+            выполняется через after_id.
+        by_name : bool
+            Сортировать по имени, затем по идентификатору: с name_prefix
+            первые limit строк читаются прямо из индекса по name без
+            сортировки всех совпадений. Несовместимо с after_id.
+
+        Returns
+        -------
+        list of Client
+            Клиенты страницы, упорядоченные по идентификатору (при by_name —
+            по имени).
+        """
+        conditions, params = [], []
+        if name_prefix:
+            conditions, params = _prefix_conditions("name", name_prefix)
+        rows = self._fetch_page("SELECT id, name, phone, email FROM clients", "id",
+                                conditions, params, limit, after_id, descending, offset,
+                                order_columns=("name", "id") if by_name else None)
+        return [Client(name=row[1], phone=row[2], email=row[3], id=row[0]) for row in rows]
+
+    def iter_clients(self, chunk_size=PAGE_SIZE, **filters):
+        """
+        Лениво перебирает клиентов постранично.
+
+        Parameters
+        ----------
+        chunk_size : int
+            Количество клиентов, извлекаемых за один запрос.
+        **filters
+            Фильтры get_clients_page (name_prefix, descending).
+
+        Yields
+        ------
+        Client
+            Очередной клиент.
+        """
+        return _iter_pages(self.get_clients_page, chunk_size, lambda client: client.id, filters)
+
+    def add_product(self, product):
+        """
+        Добавляет объект Product в базу данных.
+
+        Parameters
+        ----------
+        product : Product
+            Объект товара.
+        """
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("INSERT INTO products (name, description, price) VALUES (?, ?, ?)",
+                           (product.name, product.description, product.price))
+            # lastrowid читается до обновления поискового индекса: его
+            # INSERT в том же курсоре перезаписывают значение.
+            new_id = cursor.lastrowid
+            self._refresh_search_index(cursor)
+            self.conn.commit()
+            product.id = new_id
+            self.product_cache.clear()
+        except sqlite3.Error as e:
+            print("Ошибка при добавлении товара:", e)
+
+    def get_products(self):
+        """
+        Извлекает все товары из базы.
+
+        Если все товары помещаются в кэш, список заполняет его и при
+        повторных вызовах возвращается из кэша без запроса к базе.
+
+        Returns
+        -------
+        list of Product
+            Список товаров в виде объектов Product.
+        """
+        return self._get_all_cached(self.product_cache, "SELECT id, name, description, price FROM products",
+                                    lambda row: Product(name=row[1], description=row[2], price=row[3], id=row[0]))
+
+    def get_product(self, product_id):
+        """
+        Возвращает товар по идентификатору, используя кэш.
+
+        Parameters
+        ----------
+        product_id : int
+            Идентификатор товара.
+
+        Returns
+        -------
+        Product or None
+            Товар или None, если товара с таким идентификатором нет.
+            Объект разделяется с кэшем, изменять его не следует.
+        """
+        return self._get_cached(self.product_cache,
+                                "SELECT id, name, description, price FROM products WHERE id = ?",
+                                product_id,
+                                lambda row: Product(name=row[1], description=row[2], price=row[3], id=row[0]))
+
+    def get_products_page(self, limit=PAGE_SIZE, after_id=None, name_prefix=None, descending=False, offset=0,
+                          by_name=False):
+        """
+        Извлекает страницу товаров с пагинацией по ключу (keyset).
+
+        Parameters
+        ----------
+        limit : int
+            Максимальное количество товаров на странице.
+        after_id : int, optional
+            Идентификатор последнего товара предыдущей страницы.
+        name_prefix : str, optional
+            Префикс наименования товара.
+        descending : bool
+            Сортировать ли по убыванию идентификатора.
+        offset : int
+            Количество строк, пропускаемых после курсора; нужно только для
+            перехода в произвольное место, последовательный обход
+            выполняется через after_id.
+        by_name : bool
+            Сортировать по имени, затем по идентификатору: с name_prefix
+            первые limit строк читаются прямо из индекса по name без
+            сортировки всех совпадений. Несовместимо с after_id.
+
+        Returns
+        -------
+        list of Product
+            Товары страницы, упорядоченные по идентификатору (при by_name —
+            по имени).
+        """
+        conditions, params = [], []
+        if name_prefix:
+            conditions, params = _prefix_conditions("name", name_prefix)
+        rows = self._fetch_page("SELECT id, name, description, price FROM products", "id",
+                                conditions, params, limit, after_id, descending, offset,
+                                order_columns=("name", "id") if by_name else None)
+        return [Product(name=row[1], description=row[2], price=row[3], id=row[0]) for row in rows]
+
+    def iter_products(self, chunk_size=PAGE_SIZE, **filters):
+        """
+        Лениво перебирает товары постранично.
+
+        Parameters
+        ----------
+        chunk_size : int
+            Количество товаров, извлекаемых за один запрос.
+        **filters
+            Фильтры get_products_page (name_prefix, descending).
+
+        Yields
+        ------
+        Product
+            Очередной товар.
+        """
+        return _iter_pages(self.get_products_page, chunk_size, lambda product: product.id, filters)
+
+    def add_order(self, order):
+        """
+        Добавляет заказ (Order или SpecialOrder) и его детали в базу.
+
+        Заказ и все его строки записываются одной транзакцией: при ошибке
+        в базе не остаётся частично записанного заказа.
+
+        Parameters
+        ----------
+        order : Order or SpecialOrder
+            Объект заказа.
+        """
+        cursor = self.conn.cursor()
+        try:
+            self._insert_orders(cursor, [order])
+            self._refresh_order_stats(cursor)
+            self.conn.commit()
+        except Exception as e:
+            # Откатываем при любой ошибке, чтобы незафиксированная вставка
+            # не попала в базу со следующим commit.
+            self.conn.rollback()
+            order.id = None
+            if not isinstance(e, sqlite3.Error):
+                raise
+            print("Ошибка при добавлении заказа:", e)
+
+    def add_orders(self, orders, chunk_size=IMPORT_CHUNK_SIZE):
+        """
+        Добавляет набор заказов одной транзакцией.
+
+        Строки заказов накапливаются и вставляются через executemany
+        порциями по chunk_size заказов. При ошибке транзакция откатывается
+        целиком, и ни один заказ из набора не сохраняется.
+
+        Parameters
+        ----------
+        orders : iterable of Order or SpecialOrder
+            Заказы для добавления.
+        chunk_size : int
+            Количество заказов, строки которых вставляются за один executemany.
+
+        Returns
+        -------
+        int
+            Количество добавленных заказов (0 при ошибке).
+        """
+        cursor = self.conn.cursor()
+        added = []
+        chunk = []
+        try:
+            for chunk in _chunked(orders, chunk_size):
+                self._insert_orders(cursor, chunk)
+                added.extend(chunk)
+            self._refresh_order_stats(cursor)
+            self.conn.commit()
+        except Exception as e:
+            self.conn.rollback()
+            for order in added + chunk:
+                order.id = None
+            if not isinstance(e, sqlite3.Error):
+                raise
+            print("Ошибка при добавлении заказов:", e)
+            return 0
+        return len(added)
+
+    def _insert_orders(self, cursor, orders):
+        """Вставляет заказы и их строки в текущую транзакцию, не фиксируя её."""
+        details = []
+        for order in orders:
+            discount = getattr(order, "discount", 0)
+            cursor.execute("INSERT INTO orders (order_date, client_id, discount) VALUES (?, ?, ?)",
+                           (order.order_date, order.client.id, discount))
+            order.id = cursor.lastrowid
+            details.extend((order.id, product.id, qty, product.price) for product, qty in order.products)
+        cursor.executemany("""INSERT INTO order_details (order_id, product_id, quantity, price)
+                              VALUES (?, ?, ?, ?)""", details)
+
+    def get_orders(self):
+        """
+        Извлекает заказы, соединяя информацию о клиенте.
+
+        Returns
+        -------
+        list of tuple
+            Кортеж (order_id, order_date, client_name, discount) для каждого заказа.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT orders.id, orders.order_date, clients.name, orders.discount
+            FROM orders
+            LEFT JOIN clients ON orders.client_id = clients.id
+        """)
+        return cursor.fetchall()
+
+    def get_orders_page(self, limit=PAGE_SIZE, after_id=None, date_from=None, date_to=None,
+                        client_id=None, descending=False, offset=0):
+        """
+        Извлекает страницу заказов с пагинацией по ключу (keyset).
+
+        Parameters
+        ----------
+        limit : int
+            Максимальное количество заказов на странице.
+        after_id : int, optional
+            Идентификатор последнего заказа предыдущей страницы.
+        date_from : str, optional
+            Нижняя граница даты заказа (включительно), например '2024-01-01'.
+        date_to : str, optional
+            Верхняя граница даты заказа (не включительно).
+        client_id : int, optional
+            Идентификатор клиента.
+        descending : bool
+            Сортировать ли по убыванию идентификатора.
+        offset : int
+            Количество строк, пропускаемых после курсора; нужно только для
+            перехода в произвольное место, последовательный обход
+            выполняется через after_id.
+
+        Returns
+        -------
+        list of tuple
+            Кортеж (order_id, order_date, client_name, discount) для каждого заказа.
+        """
+        conditions, params = _order_conditions(date_from, date_to, client_id)
+        # Сначала отбираются только id страницы, и соединение с клиентами
+        # выполняется для строк страницы, а не для всех пропускаемых OFFSET.
+        page, params = self._page_query("SELECT orders.id FROM orders", "orders.id", conditions, params,
+                                        limit, after_id, descending, offset)
+        cursor = self.conn.cursor()
+        cursor.execute(f"""
+            SELECT orders.id, orders.order_date, clients.name, orders.discount
+            FROM ({page}) AS page
+            JOIN orders ON orders.id = page.id
+            LEFT JOIN clients ON orders.client_id = clients.id
+            ORDER BY orders.id {'DESC' if descending else 'ASC'}
+        """, params)
+        return cursor.fetchall()
+
+    def iter_orders(self, chunk_size=PAGE_SIZE, **filters):
+        """
+        Лениво перебирает заказы постранично.
+
+        Parameters
+        ----------
+        chunk_size : int
+            Количество заказов, извлекаемых за один запрос.
+        **filters
+            Фильтры get_orders_page (date_from, date_to, client_id, descending).
+
+        Yields
+        ------
+        tuple
+            Кортеж (order_id, order_date, client_name, discount).
+        """
+        return _iter_pages(self.get_orders_page, chunk_size, lambda order: order[0], filters)
+
+    def search_clients(self, text, limit=SEARCH_LIMIT):
+        """
+        Ищет клиентов по словам из имени, телефона и email.
+
+        Parameters
+        ----------
+        text : str
+            Строка поиска без учёта регистра, например 'иван петр':
+            слова должны совпадать целиком, а последнее — с началом слова.
+        limit : int
+            Максимальное количество результатов.
+
+        Returns
+        -------
+        list of Client
+            Найденные клиенты, упорядоченные по релевантности (bm25)
+            среди первых SEARCH_CANDIDATES совпадений.
+        """
+        rows = self._search("""
+            SELECT clients.id, clients.name, clients.phone, clients.email
+            FROM (SELECT rowid, rank FROM clients_fts WHERE clients_fts MATCH ? LIMIT ?) AS found
+            JOIN clients ON clients.id = found.rowid
+            ORDER BY found.rank
+            LIMIT ?
+        """, text, limit)
+        return [Client(name=row[1], phone=row[2], email=row[3], id=row[0]) for row in rows]
+
+    def search_products(self, text, limit=SEARCH_LIMIT):
+        """
+        Ищет товары по словам из наименования и описания.
+
+        Parameters
+        ----------
+        text : str
+            Строка поиска, см. search_clients.
+        limit : int
+            Максимальное количество результатов.
+
+        Returns
+        -------
+        list of Product
+            Найденные товары, упорядоченные по релевантности (bm25)
+            среди первых SEARCH_CANDIDATES совпадений.
+        """
+        rows = self._search("""
+            SELECT products.id, products.name, products.description, products.price
+            FROM (SELECT rowid, rank FROM products_fts WHERE products_fts MATCH ? LIMIT ?) AS found
+            JOIN products ON products.id = found.rowid
+            ORDER BY found.rank
+            LIMIT ?
+        """, text, limit)
+        return [Product(name=row[1], description=row[2], price=row[3], id=row[0]) for row in rows]
+
+    def search(self, text, limit=SEARCH_LIMIT):
+        """
+        Ищет одновременно клиентов и товары.
+
+        Parameters
+        ----------
+        text : str
+            Строка поиска, см. search_clients.
+        limit : int
+            Максимальное количество результатов каждого вида.
+
+        Returns
+        -------
+        dict
+            {'clients': list of Client, 'products': list of Product}.
+        """
+        return {"clients": self.search_clients(text, limit),
+                "products": self.search_products(text, limit)}
+
+    def _search(self, query, text, limit):
+        """Выполняет полнотекстовый запрос query для строки поиска text."""
+        match = _fts_query(text)
+        if match is None:
+            return []
+        self._catch_up(self._refresh_search_index, "Ошибка при обновлении поискового индекса:")
+        try:
+            return self.conn.execute(query, (match, max(limit, SEARCH_CANDIDATES), limit)).fetchall()
+        except sqlite3.Error as e:
+            print("Ошибка поиска:", e)
+            return []
+
+    def cache_stats(self):
+        """
+        Возвращает статистику кэшей клиентов и товаров.
+
+        Returns
+        -------
+        dict
+            {'clients': ..., 'products': ...}, значения — словари
+            LRUCache.stats (hits, misses, size, maxsize).
+        """
+        return {"clients": self.client_cache.stats(), "products": self.product_cache.stats()}
+
+    def stats_snapshot(self):
+        """
+        Возвращает снимок статистики для отображения в GUI или консоли.
+
+        Returns
+        -------
+        dict
+            Ключ 'cache' (см. cache_stats) и, если включён сбор статистики
+            запросов, ключи QueryStats.snapshot: 'methods', 'statements',
+            'transactions', 'slow_queries'.
+        """
+        snapshot = {"cache": self.cache_stats()}
+        if self.stats is not None:
+            snapshot.update(self.stats.snapshot())
+        return snapshot
+
+    def invalidate_cache(self):
+        """Очищает кэши клиентов и товаров."""
+        self.client_cache.clear()
+        self.product_cache.clear()
+
+    def _sync_cache(self):
+        """
+        Очищает кэши, если базу изменило другое соединение.
+
+        PRAGMA data_version меняется после фиксации транзакций другими
+        соединениями (например, фоновым потоком GUI); изменения через это
+        соединение сбрасывают кэш в методах записи.
+        """
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._data_version = version
+            self.invalidate_cache()
+
+    def _get_cached(self, cache, query, key, make):
+        """Возвращает объект по ключу из кэша, при промахе загружая его запросом query."""
+        self._sync_cache()
+        value = cache.get(key)
+        if value is None:
+            row = self.conn.execute(query, (key,)).fetchone()
+            if row is None:
+                return None
+            value = make(row)
+            cache.put(key, value)
+        return value
+
+    def _get_all_cached(self, cache, query, make):
+        """Возвращает все объекты таблицы из кэша, если он полон, иначе запросом query."""
+        self._sync_cache()
+        if cache.complete:
+            cache.hits += 1
+            return sorted(cache.values(), key=lambda item: item.id)
+        cache.misses += 1
+        values = [make(row) for row in self.conn.execute(query)]
+        if len(values) <= cache.maxsize:
+            cache.clear()
+            for value in values:
+                cache.put(value.id, value)
+            cache.complete = True
+        return values
+
+    def count_clients(self, name_prefix=None):
+        """
+        Подсчитывает клиентов, при необходимости с фильтром по префиксу имени.
+
+        Returns
+        -------
+        int
+            Количество клиентов.
+        """
+        conditions, params = [], []
+        if name_prefix:
+            conditions, params = _prefix_conditions("name", name_prefix)
+        return self._count("SELECT COUNT(*) FROM clients", conditions, params)
+
+    def count_orders(self, date_from=None, date_to=None, client_id=None):
+        """
+        Подсчитывает заказы с теми же фильтрами, что и get_orders_page.
+
+        Returns
+        -------
+        int
+            Количество заказов.
+        """
+        conditions, params = _order_conditions(date_from, date_to, client_id)
+        return self._count("SELECT COUNT(*) FROM orders", conditions, params)
+
+    def get_order_totals(self, date_from=None, date_to=None, client_id=None, order_id=None):
+        """
+        Рассчитывает стоимость заказов средствами SQL с учётом скидки.
+
+        Аналог Order.total_cost / SpecialOrder.total_cost для сохранённых
+        заказов: сумма order_details.price * quantity, умноженная на
+        (1 - discount / 100).
+
+        Parameters
+        ----------
+        date_from : str, optional
+            Нижняя граница даты заказа (включительно).
+        date_to : str, optional
+            Верхняя граница даты заказа (не включительно).
+        client_id : int, optional
+            Идентификатор клиента.
+        order_id : int, optional
+            Идентификатор заказа.
+
+        Returns
+        -------
+        list of tuple
+            Кортеж (order_id, total) для каждого заказа, по возрастанию id.
+        """
+        query, params = _order_totals_query(date_from, date_to, client_id, order_id)
+        cursor = self.conn.cursor()
+        cursor.execute(f"SELECT order_id, total FROM ({query}) ORDER BY order_id", params)
+        return cursor.fetchall()
+
+    def get_client_revenue(self, date_from=None, date_to=None, limit=None):
+        """
+        Рассчитывает выручку по клиентам одним агрегирующим запросом.
+
+        Parameters
+        ----------
+        date_from : str, optional
+            Нижняя граница даты заказа (включительно).
+        date_to : str, optional
+            Верхняя граница даты заказа (не включительно).
+        limit : int, optional
+            Вернуть только limit клиентов с наибольшей выручкой.
+
+        Returns
+        -------
+        list of tuple
+            Кортеж (client_id, client_name, orders_count, revenue),
+            по убыванию выручки.
+        """
+        query, params = _order_totals_query(date_from, date_to)
+        query = f"""
+            SELECT totals.client_id, clients.name, COUNT(*), SUM(totals.total) AS revenue
+            FROM ({query}) AS totals
+            LEFT JOIN clients ON clients.id = totals.client_id
+            GROUP BY totals.client_id
+            ORDER BY revenue DESC
+        """
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        cursor = self.conn.cursor()
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+    def get_daily_revenue(self, date_from=None, date_to=None, client_id=None):
+        """
+        Рассчитывает количество заказов и выручку по дням одним запросом.
+
+        Parameters
+        ----------
+        date_from : str, optional
+            Нижняя граница даты заказа (включительно).
+        date_to : str, optional
+            Верхняя граница даты заказа (не включительно).
+        client_id : int, optional
+            Идентификатор клиента.
+
+        Returns
+        -------
+        list of tuple
+            Кортеж (date, orders_count, revenue), где date — строка 'YYYY-MM-DD',
+            по возрастанию даты.
+        """
+        query, params = _order_totals_query(date_from, date_to, client_id)
+        cursor = self.conn.cursor()
+        cursor.execute(f"""
+            SELECT day, COUNT(*), SUM(total)
+            FROM ({query})
+            GROUP BY day
+            ORDER BY day
+        """, params)
+        return cursor.fetchall()
+
+    def _count(self, query, conditions, params):
+        """Выполняет запрос COUNT(*) с условиями WHERE."""
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        cursor = self.conn.cursor()
+        cursor.execute(query, params)
+        return cursor.fetchone()[0]
+
+    def _fetch_page(self, query, id_column, conditions, params, limit, after_id, descending, offset=0,
+                    order_columns=None):
+        """Выполняет запрос страницы, см. _page_query."""
+        query, params = self._page_query(query, id_column, conditions, params, limit, after_id, descending,
+                                         offset, order_columns)
+        cursor = self.conn.cursor()
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+    def _page_query(self, query, id_column, conditions, params, limit, after_id, descending, offset=0,
+                    order_columns=None):
+        """
+        Дополняет запрос условиями, курсором after_id, сортировкой, LIMIT и OFFSET.
+
+        order_columns задаёт сортировку вместо id_column; курсор after_id
+        работает только при сортировке по id_column.
+
+        Returns
+        -------
+        tuple(str, list)
+            Текст запроса и его параметры.
+        """
+        if order_columns is not None and after_id is not None:
+            raise ValueError("after_id нельзя использовать с сортировкой по другим столбцам")
+        conditions, params = list(conditions), list(params)
+        if after_id is not None:
+            conditions.append(f"{id_column} {'<' if descending else '>'} ?")
+            params.append(after_id)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        direction = "DESC" if descending else "ASC"
+        query += " ORDER BY " + ", ".join(f"{column} {direction}" for column in order_columns or (id_column,))
+        query += " LIMIT ?"
+        params.append(limit)
+        if offset:
+            query += " OFFSET ?"
+            params.append(offset)
+        return query, params
+
+    def iter_client_rows(self, chunk_size=EXPORT_CHUNK_SIZE):
+        """
+        Потоково извлекает строки клиентов, не загружая таблицу целиком.
+
+        Parameters
+        ----------
+        chunk_size : int
+            Количество строк, читаемых из курсора за один вызов fetchmany.
+
+        Yields
+        ------
+        tuple
+            Кортеж (id, name, phone, email).
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT id, name, phone, email FROM clients")
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield from rows
+
+    def export_clients_csv(self, filepath, chunk_size=EXPORT_CHUNK_SIZE, progress=None, cancelled=None):
+        """
+        Экспортирует список клиентов в CSV-файл.
+
+        Строки пишутся в файл по мере чтения из базы, поэтому расход памяти
+        не зависит от размера таблицы.
+
+        Parameters
+        ----------
+        filepath : str
+            Путь к CSV файлу.
+        chunk_size : int
+            Количество строк, читаемых из базы за один раз.
+        progress : callable, optional
+            Вызывается после каждой порции с количеством записанных строк.
+        cancelled : callable, optional
+            Если возвращает True, экспорт прерывается (файл остаётся неполным).
+
+        Ошибки записи файла (OSError) и чтения базы (sqlite3.Error)
+        передаются вызывающему, чтобы он мог сообщить о неудаче.
+        """
+        with open(filepath, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "name", "phone", "email"])
+            written = 0
+            for rows in _chunked(self.iter_client_rows(chunk_size), chunk_size):
+                if cancelled is not None and cancelled():
+                    break
+                writer.writerows(rows)
+                written += len(rows)
+                if progress is not None:
+                    progress(written)
+
+    def export_clients_json(self, filepath, json_lines=False, chunk_size=EXPORT_CHUNK_SIZE,
+                            progress=None, cancelled=None):
+        """
+        Экспортирует список клиентов в JSON-файл.
+
+        Объекты сериализуются по одному по мере чтения из базы, поэтому
+        расход памяти не зависит от размера таблицы.
+
+        Parameters
+        ----------
+        filepath : str
+            Путь к JSON файлу.
+        json_lines : bool
+            Если True, файл пишется в формате JSON Lines (один объект на строку),
+            иначе как JSON-массив.
+        chunk_size : int
+            Количество строк, читаемых из базы за один раз.
+        progress : callable, optional
+            Вызывается после каждой порции с количеством записанных строк.
+        cancelled : callable, optional
+            Если возвращает True, экспорт прерывается (файл остаётся неполным).
+
+        Ошибки записи файла (OSError) и чтения базы (sqlite3.Error)
+        передаются вызывающему, чтобы он мог сообщить о неудаче.
+        """
+        with open(filepath, "w", encoding="utf-8") as f:
+            first = True
+            written = 0
+            for rows in _chunked(self.iter_client_rows(chunk_size), chunk_size):
+                if cancelled is not None and cancelled():
+                    break
+                for client_id, name, phone, email in rows:
+                    data = {"id": client_id, "name": name, "phone": phone, "email": email}
+                    if json_lines:
+                        f.write(json.dumps(data, ensure_ascii=False) + "\n")
+                        continue
+                    item = json.dumps(data, ensure_ascii=False, indent=4).replace("\n", "\n    ")
+                    f.write(("[\n    " if first else ",\n    ") + item)
+                    first = False
+                written += len(rows)
+                if progress is not None:
+                    progress(written)
+            if not json_lines:
+                f.write("[]" if first else "\n]")
+
+    def import_clients(self, rows, chunk_size=IMPORT_CHUNK_SIZE, single_transaction=False, validate=True,
+                       progress=None, cancelled=None):
+        """
+        Пакетно импортирует клиентов из последовательности словарей.
+
+        Строки читаются потоково и вставляются порциями через executemany.
+        Некорректные строки не прерывают импорт, а собираются в отчёт.
+
+        Parameters
+        ----------
+        rows : iterable of dict
+            Строки с ключами 'name', 'phone', 'email'.
+        chunk_size : int
+            Количество строк в одной порции executemany.
+        single_transaction : bool
+            Если True, весь импорт выполняется одной транзакцией,
+            иначе фиксация выполняется после каждой порции.
+        validate : bool
+            Проверять ли телефон и email (см. models.validate_contacts).
+        progress : callable, optional
+            Вызывается после каждой порции с количеством обработанных строк.
+        cancelled : callable, optional
+            Вызывается перед каждой порцией; если возвращает True, импорт
+            прерывается. Уже зафиксированные порции остаются в базе, а при
+            single_transaction=True импорт откатывается целиком.
+
+        Исключение, выброшенное при чтении rows, передаётся вызывающему
+        после отката текущей порции (при single_transaction=True — всего
+        импорта); ошибки SQLite печатаются.
+
+        Returns
+        -------
+        tuple(int, list of tuple)
+            Количество добавленных клиентов и список отклонённых строк
+            в виде кортежей (номер строки, данные, причина).
+        """
+        counts, rejected = self._write_client_batches(_prepared_client_chunks(rows, chunk_size, validate),
+                                                      self._insert_client_batch, single_transaction,
+                                                      progress, cancelled)
+        return counts["inserted"], rejected
+
+    def upsert_clients(self, rows, chunk_size=IMPORT_CHUNK_SIZE, single_transaction=False, validate=True,
+                       progress=None, cancelled=None):
+        """
+        Импортирует клиентов с обновлением уже существующих.
+
+        Строка сопоставляется с клиентом по ключу contact_key (email,
+        а при пустом email — телефон, см. CONTACT_KEY_SQL), поэтому
+        повторный импорт той же выгрузки не создаёт дубликатов. Порция
+        строк записывается во временную таблицу и переносится одним
+        запросом INSERT ... ON CONFLICT по уникальному индексу ключа:
+        новые клиенты добавляются, у найденных обновляются изменившиеся
+        имя, телефон и email, совпадающие строки не перезаписываются.
+        Строки, совпавшие с существующими клиентами, всё равно расходуют
+        значения AUTOINCREMENT, поэтому в id новых клиентов бывают пропуски.
+
+        Parameters
+        ----------
+        rows : iterable of dict
+            Строки с ключами 'name', 'phone', 'email'.
+        chunk_size, single_transaction, validate, progress, cancelled
+            См. import_clients.
+
+        Returns
+        -------
+        tuple(dict, list of tuple)
+            Счётчики строк {'inserted', 'updated', 'unchanged'} и список
+            отклонённых строк в виде кортежей (номер строки, данные, причина).
+        """
+        return self._write_client_batches(_prepared_client_chunks(rows, chunk_size, validate),
+                                          self._upsert_client_batch, single_transaction, progress, cancelled)
+
+    def _write_client_batches(self, batches, write, single_transaction, progress, cancelled):
+        """
+        Записывает подготовленные порции клиентов; общий цикл всех импортов.
+
+        Parameters
+        ----------
+        batches : iterable of tuple
+            Порции (строки для записи, отклонённые строки, количество
+            обработанных строк), например из _prepared_client_chunks.
+        write : callable
+            Функция write(cursor, batch), записывающая порцию и возвращающая
+            словарь приращений счётчиков 'inserted', 'updated', 'unchanged'.
+        single_transaction, progress, cancelled
+            См. import_clients.
+
+        Returns
+        -------
+        tuple(dict, list)
+            Счётчики {'inserted', 'updated', 'unchanged'} и все отклонённые строки.
+        """
+        counts = dict.fromkeys(("inserted", "updated", "unchanged"), 0)
+        rejected = []
+        processed = 0
+        cursor = self.conn.cursor()
+        try:
+            for batch, batch_rejected, batch_processed in batches:
+                if cancelled is not None and cancelled():
+                    if single_transaction:
+                        self.conn.rollback()
+                        counts = dict.fromkeys(counts, 0)
+                    break
+                rejected.extend(batch_rejected)
+                written = write(cursor, batch)
+                self._refresh_search_index(cursor)
+                if not single_transaction:
+                    self.conn.commit()
+                for name, value in written.items():
+                    counts[name] += value
+                processed += batch_processed
+                if progress is not None:
+                    progress(processed)
+            self.conn.commit()
+        except Exception as e:
+            # Откатываем при любой ошибке, в том числе при ошибке чтения строк,
+            # чтобы незафиксированная порция не попала в базу со следующим commit.
+            self.conn.rollback()
+            if single_transaction:
+                counts = dict.fromkeys(counts, 0)
+            if not isinstance(e, sqlite3.Error):
+                raise
+            print("Ошибка при импорте клиентов:", e)
+        finally:
+            self.client_cache.clear()
+        return counts, rejected
+
+    def _insert_client_batch(self, cursor, batch):
+        """Добавляет порцию клиентов, не фиксируя транзакцию."""
+        cursor.executemany("INSERT INTO clients (name, phone, email) VALUES (?, ?, ?)", batch)
+        return {"inserted": len(batch)}
+
+    def _upsert_client_batch(self, cursor, batch):
+        """
+        Добавляет или обновляет порцию клиентов, не фиксируя транзакцию.
+
+        Returns
+        -------
+        dict
+            Количество добавленных, обновлённых и не изменившихся строк порции.
+        """
+        self._refresh_contact_keys(cursor)
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS client_import (name TEXT, phone TEXT, email TEXT)")
+        cursor.execute("DELETE FROM temp.client_import")
+        cursor.executemany("INSERT INTO temp.client_import (name, phone, email) VALUES (?, ?, ?)", batch)
+        last_id = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM clients").fetchone()[0]
+        # RETURNING возвращает только добавленные и действительно обновлённые
+        # строки; WHERE в SELECT обязателен для разбора ON CONFLICT.
+        changed = cursor.execute(f"""
+            INSERT INTO clients (name, phone, email, contact_key)
+            SELECT name, phone, email, {CONTACT_KEY_SQL} FROM temp.client_import
+            WHERE true
+            ORDER BY rowid
+            ON CONFLICT(contact_key) DO UPDATE SET
+                name = excluded.name, phone = excluded.phone, email = excluded.email
+            WHERE name IS NOT excluded.name OR phone IS NOT excluded.phone OR email IS NOT excluded.email
+            RETURNING id
+        """).fetchall()
+        # Строка, повторяющая ключ более ранней строки той же порции,
+        # обновляет только что добавленного клиента.
+        new_ids = {client_id for (client_id,) in changed if client_id > last_id}
+        return {"inserted": len(new_ids), "updated": len(changed) - len(new_ids),
+                "unchanged": len(batch) - len(changed)}
+
+    def import_clients_files(self, paths, workers=None, split_bytes=PARALLEL_SPLIT_BYTES, chunk_size=IMPORT_CHUNK_SIZE,
+                             single_transaction=False, validate=True, progress=None, cancelled=None):
+        """
+        Параллельно импортирует клиентов из нескольких файлов CSV, JSON и JSON Lines.
+
+        Разбор и проверка частей файлов (см. _client_file_tasks) выполняются
+        в пуле процессов, а все вставки делает одно соединение этого объекта,
+        поэтому соблюдается правило SQLite об одном писателе. Результаты
+        принимаются в порядке файлов, и клиенты получают те же идентификаторы
+        и номера отклонённых строк, что и при последовательном импорте.
+        Каждая часть возвращается порциями по chunk_size строк, которые
+        записываются, фиксируются и отмечаются в progress по одной.
+        Одновременно в обработке не больше двух частей на процесс, поэтому
+        память ограничена размером части, если запись отстаёт от разбора.
+
+        Parameters
+        ----------
+        paths : list of str
+            Пути к файлам; формат определяется по расширению
+            (см. CLIENT_FILE_FORMATS).
+        workers : int, optional
+            Количество процессов; по умолчанию — число ядер.
+        split_bytes : int
+            Примерный размер части файла CSV или JSON Lines для одного процесса.
+        chunk_size : int
+            Количество строк в одной порции вставки.
+        single_transaction, validate, progress, cancelled
+            См. import_clients.
+
+        Returns
+        -------
+        tuple(int, list of tuple)
+            Количество добавленных клиентов и список отклонённых строк
+            в виде кортежей (путь, номер строки, данные, причина).
+
+        Raises
+        ------
+        ValueError
+            Если какой-либо файл не найден, не читается или имеет неизвестный
+            формат (проверяется до начала импорта, сообщаются все такие
+            файлы), а также если файл не удалось разобрать. В последнем случае
+            импорт прерывается как в import_clients_csv: уже зафиксированные
+            порции остаются в базе, если не задан single_transaction.
+        """
+        tasks = iter(_client_file_tasks(paths, split_bytes))
+        workers = workers or os.cpu_count()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+
+            def submit():
+                while len(pending) < 2 * workers:
+                    task = next(tasks, None)
+                    if task is None:
+                        return
+                    pending.append((task, pool.submit(_read_client_task, task, chunk_size, validate)))
+
+            def batches():
+                submit()
+                while pending:
+                    (path, _, start, _, _), future = pending.popleft()
+                    if not start:
+                        offset = 0  # Строк файла в предыдущих частях
+                    try:
+                        chunks = future.result()
+                    except (OSError, ValueError) as e:
+                        where = f" (после строки {offset})" if offset else ""
+                        raise ValueError(f"Ошибка чтения файла {path}{where}: {e}") from e
+                    submit()
+                    for batch, rejected, count in chunks:
+                        yield batch, [(path, offset + number, row, reason) for number, row, reason in rejected], count
+                    offset += sum(count for _, _, count in chunks)
+
+            try:
+                counts, rejected = self._write_client_batches(batches(), self._insert_client_batch,
+                                                              single_transaction, progress, cancelled)
+            finally:
+                for _, future in pending:
+                    future.cancel()
+        return counts["inserted"], rejected
+
+    def import_clients_csv(self, filepath, upsert=False, **kwargs):
+        """
+        Импортирует клиентов из CSV-файла.
+
+        Parameters
+        ----------
+        filepath : str
+            Путь к CSV файлу.
+        upsert : bool
+            Если True, существующие клиенты обновляются (см. upsert_clients).
+        **kwargs
+            Параметры пакетной вставки, см. import_clients.
+
+        Returns
+        -------
+        tuple(int or dict, list of tuple)
+            Количество добавленных клиентов (при upsert=True — счётчики
+            upsert_clients) и список отклонённых строк.
+
+        Ошибки открытия и чтения файла (OSError, ValueError — например,
+        неверная кодировка или некорректный JSON) передаются вызывающему,
+        поэтому тип результата не зависит от пути ошибки. Если ошибка
+        случилась посреди файла, уже зафиксированные порции остаются в базе.
+        """
+        importer = self.upsert_clients if upsert else self.import_clients
+        with open(filepath, newline="", encoding="utf-8") as f:
+            return importer(csv.DictReader(f), **kwargs)
+
+    def import_clients_json(self, filepath, json_lines=False, upsert=False, **kwargs):
+        """
+        Импортирует клиентов из JSON-файла.
+
+        Parameters
+        ----------
+        filepath : str
+            Путь к JSON файлу.
+        json_lines : bool
+            Если True, файл читается потоково в формате JSON Lines;
+            некорректные строки отклоняются с причиной "некорректный JSON".
+        upsert : bool
+            Если True, существующие клиенты обновляются (см. upsert_clients).
+        **kwargs
+            Параметры пакетной вставки, см. import_clients.
+
+        Returns
+        -------
+        tuple(int or dict, list of tuple)
+            Количество добавленных клиентов (при upsert=True — счётчики
+            upsert_clients) и список отклонённых строк.
+
+        Ошибки открытия и чтения файла (OSError, ValueError — например,
+        неверная кодировка или некорректный JSON) передаются вызывающему,
+        поэтому тип результата не зависит от пути ошибки. Если ошибка
+        случилась посреди файла, уже зафиксированные порции остаются в базе.
+        """
+        importer = self.upsert_clients if upsert else self.import_clients
         with open(filepath, encoding="utf-8") as f:
+            if json_lines:
+                return importer(_parse_json_lines(f), **kwargs)
             clients_data = json.load(f)
-            for data in clients_data:
-                client = Client(name=data["name"], phone=data["phone"], email=data["email"])
-                self.add_client(client)
-    except Exception as e:
-        print("Ошибка импорта JSON:", e)
\ No newline at end of file
+        return importer(clients_data, **kwargs)
@@ -1,192 +1,787 @@
-""" Модуль gui.py Содержит графический интерфейс с использованием tkinter для работы с клиентами и заказами. """
-
-import tkinter as tk from tkinter import ttk, messagebox, filedialog from datetime import datetime from db import Database from models import Client, Product, Order, SpecialOrder
-
-class MainGUI(tk.Tk): """ Главное окно графического интерфейса. """ def init(self, db): super().init() self.db = db self.title("Система учёта заказов и клиентов") self.geometry("900x600") self.create_menu() self.create_widgets()
-
-def create_menu(self):
-    """Создаёт меню приложения."""
-    menubar = tk.Menu(self)
-
-    # Меню для клиентов
-    client_menu = tk.Menu(menubar, tearoff=0)
-    client_menu.add_command(label="Добавить клиента", command=self.open_add_client)
-    client_menu.add_command(label="Просмотреть клиентов", command=self.load_clients)
-    menubar.add_cascade(label="Клиенты", menu=client_menu)
-
-    # Меню для заказов
-    order_menu = tk.Menu(menubar, tearoff=0)
-    order_menu.add_command(label="Создать заказ", command=self.open_create_order)
-    order_menu.add_command(label="Просмотреть заказы", command=self.load_orders)
-    menubar.add_cascade(label="Заказы", menu=order_menu)
-
-    # Меню для импорта/экспорта
-    ie_menu = tk.Menu(menubar, tearoff=0)
-    ie_menu.add_command(label="Экспорт клиентов в CSV", command=self.export_clients_csv)
-    ie_menu.add_command(label="Экспорт клиентов в JSON", command=self.export_clients_json)
-    ie_menu.add_separator()
-    ie_menu.add_command(label="Импорт клиентов из CSV", command=self.import_clients_csv)
-    ie_menu.add_command(label="Импорт клиентов из JSON", command=self.import_clients_json)
-    menubar.add_cascade(label="Импорт/Экспорт", menu=ie_menu)
-
-    self.config(menu=menubar)
-
-def create_widgets(self):
-    """Создаёт основные элементы интерфейса."""
-    self.notebook = ttk.Notebook(self)
-    self.notebook.pack(fill="both", expand=True)
-
-    # Вкладка клиентов
-    self.clients_frame = ttk.Frame(self.notebook)
-    self.notebook.add(self.clients_frame, text="Клиенты")
-    self.clients_tree = ttk.Treeview(self.clients_frame,
-                                     columns=("id", "name", "phone", "email"),
-                                     show="headings")
-    for col, heading in zip(("id", "name", "phone", "email"),
-                              ("ID", "Имя", "Телефон", "Email")):
-        self.clients_tree.heading(col, text=heading)
-    self.clients_tree.pack(fill="both", expand=True)
-
-    # Вкладка заказов
-    self.orders_frame = ttk.Frame(self.notebook)
-    self.notebook.add(self.orders_frame, text="Заказы")
-    self.orders_tree = ttk.Treeview(self.orders_frame,
-                                    columns=("id", "date", "client", "discount"),
-                                    show="headings")
-    for col, heading in zip(("id", "date", "client", "discount"),
-                              ("ID", "Дата", "Клиент", "Скидка")):
-        self.orders_tree.heading(col, text=heading)
-    self.orders_tree.pack(fill="both", expand=True)
-
-def open_add_client(self):
-    """Открывает окно для добавления клиента."""
-    window = tk.Toplevel(self)
-    window.title("Добавить клиента")
-    window.geometry("300x250")
-
-    tk.Label(window, text="Имя:").pack(pady=5)
-    name_entry = tk.Entry(window)
-    name_entry.pack(pady=5)
-    tk.Label(window, text="Телефон:").pack(pady=5)
-    phone_entry = tk.Entry(window)
-    phone_entry.pack(pady=5)
-    tk.Label(window, text="Email:").pack(pady=5)
-    email_entry = tk.Entry(window)
-    email_entry.pack(pady=5)
-
-    def save_client():
-        name = name_entry.get().strip()
-        phone = phone_entry.get().strip()
-        email = email_entry.get().strip()
-        client = Client(name, phone, email)
-        if not client.validate():
-            messagebox.showerror("Ошибка", "Некорректный email или телефон!")
-            return
-        self.db.add_client(client)
-        messagebox.showinfo("Успех", f"Клиент {client.name} добавлен.")
-        window.destroy()
-        self.load_clients()
+"""
+Модуль gui.py
+Содержит графический интерфейс с использованием tkinter для работы с клиентами и заказами.
+"""
+
+import os
+import tempfile
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+from datetime import datetime
+from db import Database
+from models import Client, Product, Order, SpecialOrder
+from worker import DatabaseWorker
+from instrumentation import format_stats
+
+# Количество вариантов, показываемых в списке поиска.
+SEARCH_LIMIT = 20
+# Задержка поиска после последнего нажатия клавиши, мс.
+SEARCH_DELAY = 300
+
+
+def search_entities(get_by_id, get_page, text, limit=SEARCH_LIMIT):
+    """
+    Ищет объекты по идентификатору или префиксу имени.
+
+    Parameters
+    ----------
+    get_by_id : callable
+        Функция get_by_id(id), например Database.get_client.
+    get_page : callable
+        Постраничный запрос с параметрами name_prefix и by_name, например
+        Database.get_clients_page.
+    text : str
+        Введённый текст: число ищется как идентификатор, иначе — как префикс
+        имени (также с заглавной первой буквой).
+    limit : int
+        Максимальное количество результатов.
+
+    Returns
+    -------
+    list
+        Найденные объекты без повторов.
+    """
+    found = {}
+    if text.isdigit():
+        item = get_by_id(int(text))
+        if item is not None:
+            found[item.id] = item
+    for prefix in dict.fromkeys((text, text[:1].upper() + text[1:])):
+        if len(found) >= limit:
+            break
+        for item in get_page(limit=limit - len(found), name_prefix=prefix or None, by_name=bool(prefix)):
+            found.setdefault(item.id, item)
+    return list(found.values())
+
+
+class VirtualTable(ttk.Frame):
+    """
+    Виртуализированная таблица на основе ttk.Treeview.
+
+    В дереве существуют только видимые на экране строки, а данные
+    подгружаются из источника страницами по мере прокрутки. Небольшой
+    буфер строк вокруг окна позволяет прокручивать без запросов к базе,
+    поэтому время прокрутки и обновления не зависит от размера таблицы.
+
+    Parameters
+    ----------
+    master : tk.Widget
+        Родительский виджет.
+    columns : tuple of str
+        Идентификаторы столбцов.
+    headings : tuple of str
+        Заголовки столбцов.
+    fetch : callable
+        Функция fetch(limit, after_id=None, descending=False, offset=0),
+        возвращающая список кортежей, первый элемент которых — идентификатор.
+    count : callable
+        Функция без аргументов, возвращающая общее количество строк.
+    buffer : int
+        Количество строк, подгружаемых сверх видимых с каждой стороны.
+    """
+    def __init__(self, master, columns, headings, fetch, count, buffer=50):
+        super().__init__(master)
+        self.fetch = fetch
+        self.count = count
+        self.buffer = buffer
+        self.total = 0
+        self.loaded = False  # Загружалась ли таблица через refresh
+        self.start = 0  # Индекс первой видимой строки
+        self.visible = 20
+        self._cache = []  # Загруженные строки вокруг видимого окна
+        self._cache_start = 0
+
+        self.tree = ttk.Treeview(self, columns=columns, show="headings")
+        for col, heading in zip(columns, headings):
+            self.tree.heading(col, text=heading)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll_to(self.start - 3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_to(self.start + 3))
+        self.tree.bind("<Prior>", lambda e: self.scroll_to(self.start - self.visible))
+        self.tree.bind("<Next>", lambda e: self.scroll_to(self.start + self.visible))
+        self.tree.bind("<Home>", lambda e: self.scroll_to(0))
+        self.tree.bind("<End>", lambda e: self.scroll_to(self.total))
 
-    tk.Button(window, text="Сохранить", command=save_client).pack(pady=10)
-
-def load_clients(self):
-    """Загружает список клиентов из базы в таблицу."""
-    for item in self.clients_tree.get_children():
-        self.clients_tree.delete(item)
-    clients = self.db.get_clients()
-    for client in clients:
-        self.clients_tree.insert("", "end", values=(client.id, client.name, client.phone, client.email))
-
-def open_create_order(self):
-    """Открывает окно для создания заказа."""
-    window = tk.Toplevel(self)
-    window.title("Создать заказ")
-    window.geometry("400x400")
-
-    # Выбор клиента
-    tk.Label(window, text="Выберите клиента:").pack(pady=5)
-    clients = self.db.get_clients()
-    client_var = tk.StringVar()
-    client_options = {f"{cl.id} - {cl.name}": cl for cl in clients}
-    client_menu = ttk.Combobox(window, values=list(client_options.keys()), textvariable=client_var)
-    client_menu.pack(pady=5)
-
-    # Выбор товара
-    tk.Label(window, text="Выберите товар:").pack(pady=5)
-    products = self.db.get_products()
-    product_var = tk.StringVar()
-    product_options = {f"{pr.id} - {pr.name}": pr for pr in products}
-    product_menu = ttk.Combobox(window, values=list(product_options.keys()), textvariable=product_var)
-    product_menu.pack(pady=5)
-
-    tk.Label(window, text="Количество:").pack(pady=5)
-    qty_entry = tk.Entry(window)
-    qty_entry.pack(pady=5)
-
-    # Ввод скидки для специального заказа
-    tk.Label(window, text="Скидка (%), если есть:").pack(pady=5)
-    discount_entry = tk.Entry(window)
-    discount_entry.pack(pady=5)
-
-    def create_order():
-        try:
-            selected_client = client_options[client_var.get()]
-            selected_product = product_options[product_var.get()]
-            qty = int(qty_entry.get())
-            discount_text = discount_entry.get().strip()
-            discount = float(discount_text) if discount_text else 0.0
-            order_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            products_list = [(selected_product, qty)]
-            # Если указана скидка – формируем SpecialOrder, иначе обычный Order.
-            if discount > 0:
-                order = SpecialOrder(selected_client, products_list, order_date, discount)
+    def refresh(self, total=None):
+        """
+        Перечитывает количество строк и заново загружает видимое окно.
+
+        Parameters
+        ----------
+        total : int, optional
+            Уже известное количество строк (например, подсчитанное в фоновом
+            потоке); если не задано, вызывается count.
+        """
+        self.total = self.count() if total is None else total
+        self.loaded = True
+        self._cache = []
+        self.scroll_to(self.start)
+
+    def append_rows(self, rows):
+        """
+        Добавляет строки в конец таблицы без повторного запроса к источнику.
+
+        Подходит для только что созданных записей, идентификаторы которых
+        больше всех существующих. Если был виден конец таблицы, он
+        остаётся видимым вместе с новыми строками.
+
+        Parameters
+        ----------
+        rows : list of tuple
+            Новые строки в формате fetch.
+
+        Returns
+        -------
+        bool
+            False, если таблица ещё не загружалась: количество строк
+            неизвестно, и её нужно загрузить через refresh.
+        """
+        if not self.loaded:
+            return False
+        at_end = self.start + self.visible >= self.total
+        if self._cache and self._cache_start + len(self._cache) == self.total:
+            self._cache.extend(rows)
+        self.total += len(rows)
+        self.scroll_to(self.total if at_end else self.start)
+        return True
+
+    def scroll_to(self, index):
+        """Прокручивает таблицу так, чтобы строка index стала первой видимой."""
+        self.start = max(0, min(index, self.total - self.visible))
+        self._render()
+
+    def _render(self):
+        """Отображает видимое окно, переиспользуя существующие элементы дерева."""
+        rows = self._rows(self.start, self.visible)
+        items = self.tree.get_children()
+        for i, row in enumerate(rows):
+            if i < len(items):
+                self.tree.item(items[i], values=row)
             else:
-                order = Order(selected_client, products_list, order_date)
-            self.db.add_order(order)
-            messagebox.showinfo("Успех", f"Заказ создан для клиента {selected_client.name}")
+                self.tree.insert("", "end", iid=str(i), values=row)
+        if len(items) > len(rows):
+            self.tree.delete(*items[len(rows):])
+        if self.total:
+            self.scrollbar.set(self.start / self.total,
+                               min(1.0, (self.start + self.visible) / self.total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _rows(self, start, size):
+        """Возвращает строки [start, start + size), при необходимости подгружая страницу."""
+        end = min(start + size, self.total)
+        cache_end = self._cache_start + len(self._cache)
+        step = self.visible + self.buffer
+        if self._cache and self._cache_start <= start <= cache_end and end - cache_end <= step:
+            if end > cache_end:
+                # Небольшая прокрутка вниз: дочитываем следующую страницу по ключу.
+                self._cache += self.fetch(limit=end - cache_end + self.buffer,
+                                          after_id=self._cache[-1][0])
+        elif self._cache and self._cache_start - step <= start and cache_end >= end >= self._cache_start:
+            # Небольшая прокрутка вверх: дочитываем предыдущую страницу по ключу.
+            rows = self.fetch(limit=self._cache_start - start + self.buffer,
+                              after_id=self._cache[0][0], descending=True)
+            self._cache = rows[::-1] + self._cache
+            self._cache_start -= len(rows)
+        elif end > start:
+            # Переход в произвольное место (полоса прокрутки, Home/End).
+            # OFFSET отсчитывается от ближайшего края таблицы, поэтому
+            # Home и End обслуживаются страницей по ключу без OFFSET.
+            self._cache_start = max(0, start - self.buffer)
+            fetch_end = min(self.total, end + self.buffer)
+            if self.total - fetch_end < self._cache_start:
+                rows = self.fetch(limit=fetch_end - self._cache_start, descending=True,
+                                  offset=self.total - fetch_end)
+                self._cache = rows[::-1]
+                self._cache_start = fetch_end - len(rows)
+            else:
+                self._cache = self.fetch(limit=fetch_end - self._cache_start, offset=self._cache_start)
+        self._trim_cache(start, size)
+        return self._cache[start - self._cache_start:end - self._cache_start]
+
+    def _trim_cache(self, start, size):
+        """Ограничивает кэш видимым окном и буфером с каждой стороны."""
+        head = start - self.buffer - self._cache_start
+        if head > 0:
+            del self._cache[:head]
+            self._cache_start += head
+        del self._cache[start + size + self.buffer - self._cache_start:]
+
+    def _on_scrollbar(self, action, value, unit=None):
+        """Обрабатывает команды полосы прокрутки."""
+        if action == "moveto":
+            self.scroll_to(int(float(value) * self.total))
+        elif unit == "pages":
+            self.scroll_to(self.start + int(value) * self.visible)
+        else:
+            self.scroll_to(self.start + int(value))
+
+    def _on_mousewheel(self, event):
+        """Прокручивает таблицу колесом мыши (Windows, macOS)."""
+        self.scroll_to(self.start + (-3 if event.delta > 0 else 3))
+
+    def _on_resize(self, event):
+        """Пересчитывает количество видимых строк при изменении размера."""
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        visible = max(1, event.height // row_height - 1)
+        if visible != self.visible:
+            self.visible = visible
+            self.scroll_to(self.start)
+
+
+class SearchCombobox(ttk.Combobox):
+    """
+    Поле выбора с поиском по мере ввода.
+
+    Варианты не загружаются заранее: после паузы во вводе вызывается
+    search, и в список попадают только первые найденные совпадения.
+    Ответы на устаревшие запросы игнорируются.
+
+    Parameters
+    ----------
+    master : tk.Widget
+        Родительский виджет.
+    search : callable
+        Функция search(text, on_done), которая асинхронно находит объекты
+        по введённому тексту и передаёт их список в on_done.
+    label : callable
+        Функция, возвращающая строку для отображения объекта в списке.
+    delay : int
+        Задержка поиска после последнего нажатия клавиши в миллисекундах.
+    """
+    def __init__(self, master, search, label=lambda item: f"{item.id} - {item.name}",
+                 delay=SEARCH_DELAY, **kwargs):
+        super().__init__(master, **kwargs)
+        self.search = search
+        self.label = label
+        self.delay = delay
+        self.options = {}
+        self._pending = None  # Идентификатор отложенного вызова after
+        self._request = 0  # Номер последнего запроса поиска
+        self.bind("<KeyRelease>", self._on_key)
+
+    def selected(self):
+        """Возвращает объект, соответствующий тексту поля, или None."""
+        return self.options.get(self.get())
+
+    def start_search(self):
+        """Немедленно выполняет поиск по текущему тексту поля."""
+        self._pending = None
+        self._request += 1
+        request = self._request
+        self.search(self.get().strip(), lambda items: self._show(request, items))
+
+    def _on_key(self, event):
+        """Откладывает поиск до паузы во вводе."""
+        if event.keysym in ("Up", "Down", "Return", "Escape", "Tab") or self.get() in self.options:
+            return
+        if self._pending is not None:
+            self.after_cancel(self._pending)
+        self._pending = self.after(self.delay, self.start_search)
+
+    def _show(self, request, items):
+        """Заполняет список результатами последнего запроса."""
+        if request != self._request or not self.winfo_exists():
+            return
+        self.options = {self.label(item): item for item in items}
+        self.configure(values=list(self.options))
+
+
+class ProgressDialog(tk.Toplevel):
+    """
+    Окно прогресса длительной фоновой операции с кнопкой отмены.
+
+    Parameters
+    ----------
+    master : tk.Widget
+        Родительское окно.
+    title : str
+        Заголовок окна.
+    """
+    def __init__(self, master, title):
+        super().__init__(master)
+        self.title(title)
+        self.geometry("300x120")
+        self.transient(master)
+        self.task = None  # Назначается после постановки задачи в очередь
+        self.label = tk.Label(self, text="Выполняется...")
+        self.label.pack(pady=10)
+        self.bar = ttk.Progressbar(self, mode="indeterminate", length=250)
+        self.bar.pack(pady=5)
+        self.bar.start(10)
+        tk.Button(self, text="Отмена", command=self.cancel).pack(pady=5)
+        self.protocol("WM_DELETE_WINDOW", self.cancel)
+
+    def update_progress(self, processed):
+        """Отображает количество обработанных строк."""
+        if not self.task.is_cancelled():
+            self.label.config(text=f"Обработано строк: {processed}")
+
+    def cancel(self):
+        """Запрашивает отмену операции."""
+        if self.task is not None:
+            self.task.cancel()
+        self.label.config(text="Отмена...")
+
+
+class MainGUI(tk.Tk):
+    """
+    Главное окно графического интерфейса.
+    """
+    def __init__(self, db):
+        super().__init__()
+        self.db = db
+        self.title("Система учёта заказов и клиентов")
+        self.geometry("900x600")
+        # Все изменения и тяжёлые запросы выполняются в фоновом потоке,
+        # а self.db используется только для чтения страниц таблиц.
+        self.worker = DatabaseWorker(self, db.db_name, profile=db.profile, instrument=db.stats is not None)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.create_menu()
+        self.create_widgets()
+
+    def on_close(self):
+        """Останавливает фоновый поток и закрывает окно."""
+        self.worker.stop()
+        self.destroy()
+
+    def show_error(self, error):
+        """Показывает ошибку фоновой операции."""
+        messagebox.showerror("Ошибка", f"Операция не выполнена: {error}")
+
+    def run_in_background(self, func, on_done=None):
+        """
+        Выполняет func(db, task) в фоновом потоке без окна прогресса.
+
+        Returns
+        -------
+        Task
+            Поставленная в очередь задача.
+        """
+        return self.worker.submit(func, on_done=on_done, on_error=self.show_error)
+
+    def search(self, func, on_done):
+        """
+        Выполняет поиск func(db) в фоновом потоке.
+
+        Ошибки поиска не показываются: при быстром вводе они лишь
+        оставляют список вариантов прежним.
+        """
+        return self.worker.submit(lambda db, task: func(db), on_done=on_done)
+
+    def run_with_progress(self, title, func, on_done):
+        """
+        Выполняет длительную операцию func(db, task) в фоновом потоке,
+        показывая окно прогресса с возможностью отмены.
+
+        Parameters
+        ----------
+        title : str
+            Заголовок окна прогресса.
+        func : callable
+            Функция, выполняемая в фоновом потоке.
+        on_done : callable
+            Вызывается в главном потоке с результатом func и задачей.
+        """
+        dialog = ProgressDialog(self, title)
+
+        def finish(result):
+            dialog.destroy()
+            on_done(result, dialog.task)
+
+        def fail(error):
+            dialog.destroy()
+            self.show_error(error)
+
+        dialog.task = self.worker.submit(func, on_done=finish, on_error=fail,
+                                         on_progress=dialog.update_progress)
+
+    def create_menu(self):
+        """Создаёт меню приложения."""
+        menubar = tk.Menu(self)
+
+        # Меню для клиентов
+        client_menu = tk.Menu(menubar, tearoff=0)
+        client_menu.add_command(label="Добавить клиента", command=self.open_add_client)
+        client_menu.add_command(label="Просмотреть клиентов", command=self.load_clients)
+        menubar.add_cascade(label="Клиенты", menu=client_menu)
+
+        # Меню для заказов
+        order_menu = tk.Menu(menubar, tearoff=0)
+        order_menu.add_command(label="Создать заказ", command=self.open_create_order)
+        order_menu.add_command(label="Просмотреть заказы", command=self.load_orders)
+        menubar.add_cascade(label="Заказы", menu=order_menu)
+
+        # Меню для импорта/экспорта
+        ie_menu = tk.Menu(menubar, tearoff=0)
+        ie_menu.add_command(label="Экспорт клиентов в CSV", command=self.export_clients_csv)
+        ie_menu.add_command(label="Экспорт клиентов в JSON", command=self.export_clients_json)
+        ie_menu.add_separator()
+        ie_menu.add_command(label="Импорт клиентов из CSV", command=self.import_clients_csv)
+        ie_menu.add_command(label="Импорт клиентов из JSON", command=self.import_clients_json)
+        menubar.add_cascade(label="Импорт/Экспорт", menu=ie_menu)
+
+        # Меню отчётов; модуль analysis и его зависимости загружаются
+        # только при первом построении отчёта.
+        report_menu = tk.Menu(menubar, tearoff=0)
+        report_menu.add_command(label="Топ-5 клиентов", command=self.show_top_clients)
+        report_menu.add_command(label="Динамика заказов", command=self.show_orders_over_time)
+        report_menu.add_command(label="Граф связей клиентов", command=self.show_client_graph)
+        report_menu.add_separator()
+        report_menu.add_command(label="Статистика запросов", command=self.show_query_stats)
+        menubar.add_cascade(label="Отчёты", menu=report_menu)
+
+        self.config(menu=menubar)
+
+    def create_widgets(self):
+        """Создаёт основные элементы интерфейса."""
+        self.notebook = ttk.Notebook(self)
+        self.notebook.pack(fill="both", expand=True)
+
+        # Вкладка клиентов
+        self.clients_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.clients_frame, text="Клиенты")
+        self.clients_table = VirtualTable(self.clients_frame,
+                                          ("id", "name", "phone", "email"),
+                                          ("ID", "Имя", "Телефон", "Email"),
+                                          fetch=self.fetch_client_rows,
+                                          count=self.db.count_clients)
+        self.clients_table.pack(fill="both", expand=True)
+        self.clients_tree = self.clients_table.tree
+
+        # Вкладка заказов
+        self.orders_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.orders_frame, text="Заказы")
+        self.orders_table = VirtualTable(self.orders_frame,
+                                         ("id", "date", "client", "discount"),
+                                         ("ID", "Дата", "Клиент", "Скидка"),
+                                         fetch=self.db.get_orders_page,
+                                         count=self.db.count_orders)
+        self.orders_table.pack(fill="both", expand=True)
+        self.orders_tree = self.orders_table.tree
+
+    def open_add_client(self):
+        """Открывает окно для добавления клиента."""
+        window = tk.Toplevel(self)
+        window.title("Добавить клиента")
+        window.geometry("300x250")
+
+        tk.Label(window, text="Имя:").pack(pady=5)
+        name_entry = tk.Entry(window)
+        name_entry.pack(pady=5)
+        tk.Label(window, text="Телефон:").pack(pady=5)
+        phone_entry = tk.Entry(window)
+        phone_entry.pack(pady=5)
+        tk.Label(window, text="Email:").pack(pady=5)
+        email_entry = tk.Entry(window)
+        email_entry.pack(pady=5)
+
+        def save_client():
+            name = name_entry.get().strip()
+            phone = phone_entry.get().strip()
+            email = email_entry.get().strip()
+            client = Client(name, phone, email)
+            if not client.validate():
+                messagebox.showerror("Ошибка", "Некорректный email или телефон!")
+                return
+
+            def done(_):
+                messagebox.showinfo("Успех", f"Клиент {client.name} добавлен.")
+                self.load_clients()
+
             window.destroy()
-            self.load_orders()
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось создать заказ: {e}")
-
-    tk.Button(window, text="Сохранить заказ", command=create_order).pack(pady=10)
-
-def load_orders(self):
-    """Загружает список заказов из базы в таблицу."""
-    for item in self.orders_tree.get_children():
-        self.orders_tree.delete(item)
-    orders = self.db.get_orders()
-    for order in orders:
-        self.orders_tree.insert("", "end", values=order)
-
-def export_clients_csv(self):
-    """Экспортирует клиентов в CSV файл."""
-    filepath = filedialog.asksaveasfilename(defaultextension=".csv",
-                                            filetypes=[("CSV files", "*.csv")])
-    if filepath:
-        self.db.export_clients_csv(filepath)
-        messagebox.showinfo("Экспорт", "Данные экспортированы в CSV.")
-
-def export_clients_json(self):
-    """Экспортирует клиентов в JSON файл."""
-    filepath = filedialog.asksaveasfilename(defaultextension=".json",
-                                            filetypes=[("JSON files", "*.json")])
-    if filepath:
-        self.db.export_clients_json(filepath)
-        messagebox.showinfo("Экспорт", "Данные экспортированы в JSON.")
-
-def import_clients_csv(self):
-    """Импортирует клиентов из CSV файла."""
-    filepath = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv")])
-    if filepath:
-        self.db.import_clients_csv(filepath)
-        messagebox.showinfo("Импорт", "Клиенты импортированы из CSV.")
+            self.run_in_background(lambda db, task: db.add_client(client), done)
+
+        tk.Button(window, text="Сохранить", command=save_client).pack(pady=10)
+
+    def fetch_client_rows(self, **kwargs):
+        """Возвращает страницу клиентов в виде строк таблицы, см. Database.get_clients_page."""
+        return [(client.id, client.name, client.phone, client.email)
+                for client in self.db.get_clients_page(**kwargs)]
+
+    def load_clients(self):
+        """Обновляет таблицу клиентов, подгружая из базы только видимые строки."""
+        self.run_in_background(lambda db, task: db.count_clients(), self.clients_table.refresh)
+
+    def open_create_order(self):
+        """
+        Открывает окно для создания заказа.
+
+        Товары с количеством набираются в корзину, и весь заказ со всеми
+        строками сохраняется одной транзакцией.
+        """
+        window = tk.Toplevel(self)
+        window.title("Создать заказ")
+        window.geometry("500x600")
+
+        # Клиенты и товары ищутся в фоне по мере ввода имени или идентификатора,
+        # поэтому окно открывается сразу при любом объёме данных.
+        tk.Label(window, text="Выберите клиента:").pack(pady=5)
+        client_menu = SearchCombobox(window, lambda text, done: self.search(
+            lambda db: search_entities(db.get_client, db.get_clients_page, text), done))
+        client_menu.pack(pady=5)
+
+        tk.Label(window, text="Выберите товар:").pack(pady=5)
+        product_menu = SearchCombobox(window, lambda text, done: self.search(
+            lambda db: search_entities(db.get_product, db.get_products_page, text), done))
+        product_menu.pack(pady=5)
+
+        client_menu.start_search()
+        product_menu.start_search()
+
+        tk.Label(window, text="Количество:").pack(pady=5)
+        qty_entry = tk.Entry(window)
+        qty_entry.insert(0, "1")
+        qty_entry.pack(pady=5)
+
+        # Корзина: строки заказа по идентификатору товара, [товар, количество].
+        cart = {}
+        cart_tree = ttk.Treeview(window, columns=("product", "qty", "price", "sum"), show="headings", height=8)
+        for col, heading in zip(("product", "qty", "price", "sum"), ("Товар", "Кол-во", "Цена", "Сумма")):
+            cart_tree.heading(col, text=heading)
+            cart_tree.column(col, width=80 if col != "product" else 200)
+        total_label = tk.Label(window, text="Итого: 0.00")
+
+        def show_line(product_id):
+            product, qty = cart[product_id]
+            values = (f"{product.id} - {product.name}", qty, f"{product.price:.2f}", f"{product.price * qty:.2f}")
+            if cart_tree.exists(product_id):
+                cart_tree.item(product_id, values=values)
+            else:
+                cart_tree.insert("", "end", iid=product_id, values=values)
+            total = sum(product.price * qty for product, qty in cart.values())
+            total_label.config(text=f"Итого: {total:.2f}")
+
+        def add_line():
+            product = product_menu.selected()
+            if product is None:
+                messagebox.showerror("Ошибка", "Выберите товар из списка.")
+                return
+            try:
+                qty = int(qty_entry.get())
+                if qty <= 0:
+                    raise ValueError(qty)
+            except ValueError:
+                messagebox.showerror("Ошибка", "Количество должно быть целым положительным числом.")
+                return
+            # Повторно добавленный товар увеличивает количество в существующей строке.
+            line = cart.setdefault(str(product.id), [product, 0])
+            line[1] += qty
+            show_line(str(product.id))
+
+        def remove_lines():
+            for product_id in cart_tree.selection():
+                del cart[product_id]
+                cart_tree.delete(product_id)
+            total = sum(product.price * qty for product, qty in cart.values())
+            total_label.config(text=f"Итого: {total:.2f}")
+
+        buttons = tk.Frame(window)
+        tk.Button(buttons, text="Добавить в заказ", command=add_line).pack(side="left", padx=5)
+        tk.Button(buttons, text="Удалить строку", command=remove_lines).pack(side="left", padx=5)
+        buttons.pack(pady=5)
+        cart_tree.pack(fill="both", expand=True, padx=5)
+        total_label.pack(pady=5)
+
+        # Ввод скидки для специального заказа
+        tk.Label(window, text="Скидка (%), если есть:").pack(pady=5)
+        discount_entry = tk.Entry(window)
+        discount_entry.pack(pady=5)
+
+        def create_order():
+            try:
+                selected_client = client_menu.selected()
+                if selected_client is None:
+                    messagebox.showerror("Ошибка", "Выберите клиента из списка.")
+                    return
+                if not cart:
+                    messagebox.showerror("Ошибка", "Добавьте в заказ хотя бы один товар.")
+                    return
+                discount_text = discount_entry.get().strip()
+                discount = float(discount_text) if discount_text else 0.0
+                order_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                products_list = [(product, qty) for product, qty in cart.values()]
+                # Если указана скидка – формируем SpecialOrder, иначе обычный Order.
+                if discount > 0:
+                    order = SpecialOrder(selected_client, products_list, order_date, discount)
+                else:
+                    order = Order(selected_client, products_list, order_date)
+
+                def done(_):
+                    if order.id is None:
+                        messagebox.showerror("Ошибка", "Не удалось сохранить заказ.")
+                        return
+                    # Новый заказ получает наибольший id, поэтому добавляется
+                    # в конец таблицы без её перезагрузки; ещё не загруженная
+                    # таблица загружается целиком.
+                    if not self.orders_table.append_rows([(order.id, order_date, selected_client.name, discount)]):
+                        self.load_orders()
+                    messagebox.showinfo("Успех", f"Заказ создан для клиента {selected_client.name}")
+
+                window.destroy()
+                self.run_in_background(lambda db, task: db.add_order(order), done)
+            except Exception as e:
+                messagebox.showerror("Ошибка", f"Не удалось создать заказ: {e}")
+
+        tk.Button(window, text="Сохранить заказ", command=create_order).pack(pady=10)
+
+    def load_orders(self):
+        """Обновляет таблицу заказов, подгружая из базы только видимые строки."""
+        self.run_in_background(lambda db, task: db.count_orders(), self.orders_table.refresh)
+
+    def export_clients_csv(self):
+        """Экспортирует клиентов в CSV файл."""
+        filepath = filedialog.asksaveasfilename(defaultextension=".csv",
+                                                filetypes=[("CSV files", "*.csv")])
+        if filepath:
+            self.run_with_progress(
+                "Экспорт клиентов",
+                lambda db, task: db.export_clients_csv(filepath, progress=task.report_progress,
+                                                       cancelled=task.is_cancelled),
+                lambda result, task: self.on_export_done("CSV", task))
+
+    def export_clients_json(self):
+        """Экспортирует клиентов в JSON файл."""
+        filepath = filedialog.asksaveasfilename(defaultextension=".json",
+                                                filetypes=[("JSON files", "*.json")])
+        if filepath:
+            self.run_with_progress(
+                "Экспорт клиентов",
+                lambda db, task: db.export_clients_json(filepath, progress=task.report_progress,
+                                                        cancelled=task.is_cancelled),
+                lambda result, task: self.on_export_done("JSON", task))
+
+    def on_export_done(self, file_format, task):
+        """Сообщает о завершении экспорта."""
+        if task.is_cancelled():
+            messagebox.showwarning("Экспорт", "Экспорт прерван, файл записан не полностью.")
+        else:
+            messagebox.showinfo("Экспорт", f"Данные экспортированы в {file_format}.")
+
+    def import_clients_csv(self):
+        """Импортирует клиентов из CSV файла."""
+        filepath = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv")])
+        if filepath:
+            upsert = self.ask_upsert()
+            self.run_with_progress(
+                "Импорт клиентов",
+                lambda db, task: db.import_clients_csv(filepath, upsert=upsert, progress=task.report_progress,
+                                                       cancelled=task.is_cancelled),
+                self.on_import_done)
+
+    def import_clients_json(self):
+        """Импортирует клиентов из JSON файла."""
+        filepath = filedialog.askopenfilename(filetypes=[("JSON files", "*.json")])
+        if filepath:
+            upsert = self.ask_upsert()
+            self.run_with_progress(
+                "Импорт клиентов",
+                lambda db, task: db.import_clients_json(filepath, upsert=upsert, progress=task.report_progress,
+                                                        cancelled=task.is_cancelled),
+                self.on_import_done)
+
+    def ask_upsert(self):
+        """Спрашивает, обновлять ли при импорте уже существующих клиентов."""
+        return messagebox.askyesno(
+            "Импорт", "Обновлять клиентов с тем же email (или телефоном) вместо добавления дубликатов?")
+
+    def on_import_done(self, result, task):
+        """Сообщает итоги импорта и обновляет таблицу клиентов."""
+        imported, rejected = result
+        if isinstance(imported, dict):
+            message = (f"Добавлено клиентов: {imported['inserted']}.\nОбновлено: {imported['updated']}."
+                       f"\nБез изменений: {imported['unchanged']}.")
+        else:
+            message = f"Импортировано клиентов: {imported}."
+        if rejected:
+            message += f"\nОтклонено строк: {len(rejected)}."
+        if task.is_cancelled():
+            message = "Импорт прерван.\n" + message
+        messagebox.showinfo("Импорт", message)
         self.load_clients()
 
-def import_clients_json(self):
-    """Импортирует клиентов из JSON файла."""
-    filepath = filedialog.askopenfilename(filetypes=[("JSON files", "*.json")])
-    if filepath:
-        self.db.import_clients_json(filepath)
-        messagebox.showinfo("Импорт", "Клиенты импортированы из JSON.")
-        self.load_clients()
\ No newline at end of file
+    def show_top_clients(self):
+        """Показывает топ 5 клиентов по числу заказов."""
+        def report(db, task):
+            import analysis
+            return analysis.top_5_clients(db)
+
+        def done(top):
+            lines = [f"{client}: {count}" for client, count in top.items()]
+            messagebox.showinfo("Топ-5 клиентов", "\n".join(lines) or "Заказов пока нет.")
+
+        self.run_in_background(report, done)
+
+    def show_orders_over_time(self):
+        """Показывает график динамики заказов по датам."""
+        def render(db, output):
+            import analysis
+            analysis.orders_over_time(db, output=output)
+
+        self.show_chart("Динамика заказов", render)
+
+    def show_client_graph(self):
+        """Показывает граф связей клиентов."""
+        def render(db, output):
+            import analysis
+            orders_df = analysis.load_orders_df(db)
+            analysis.build_client_graph(orders_df, output=output)
+
+        self.show_chart("Граф связей клиентов", render)
+
+    def show_query_stats(self):
+        """
+        Показывает статистику запросов фонового потока и кэшей.
+
+        Статистика запросов собирается, если база открыта с instrument=True
+        (переменная окружения SHOP_DB_STATS=1 при запуске main.py).
+        """
+        def show(snapshot):
+            window = tk.Toplevel(self)
+            window.title("Статистика запросов")
+            text = tk.Text(window, wrap="none", width=120, height=40)
+            text.insert("1.0", format_stats(snapshot))
+            text.config(state="disabled")
+            text.pack(fill="both", expand=True)
+
+        self.run_in_background(lambda db, task: db.stats_snapshot(), show)
+
+    def show_chart(self, title, render):
+        """
+        Строит график в фоновом потоке в PNG-файл и показывает его в отдельном окне.
+
+        Parameters
+        ----------
+        title : str
+            Заголовок окна.
+        render : callable
+            Функция render(db, output), сохраняющая график в файл output.
+        """
+        fd, path = tempfile.mkstemp(suffix=".png")
+        os.close(fd)
+
+        def task_func(db, task):
+            try:
+                render(db, path)
+            except Exception:
+                os.remove(path)
+                raise
+
+        def done(result, task):
+            try:
+                if not task.is_cancelled():
+                    window = tk.Toplevel(self)
+                    window.title(title)
+                    image = tk.PhotoImage(master=window, file=path)
+                    label = tk.Label(window, image=image)
+                    label.image = image  # Ссылка, чтобы изображение не удалил сборщик мусора
+                    label.pack()
+            finally:
+                os.remove(path)
+
+        self.run_with_progress(title, task_func, done)
@@ -0,0 +1,311 @@
+"""
+Модуль instrumentation.py
+Содержит необязательный сбор статистики запросов к SQLite: гистограммы
+задержек методов Database и SQL-операторов, количество строк и транзакций,
+а также журнал медленных запросов с планом выполнения (EXPLAIN QUERY PLAN).
+"""
+
+import functools
+import inspect
+import logging
+import sqlite3
+import time
+from collections import deque
+from datetime import datetime
+
+# Верхние границы интервалов гистограммы задержек, мс.
+BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)
+# Порог медленного запроса по умолчанию, мс.
+SLOW_QUERY_MS = 100
+# Количество последних медленных запросов, хранимых в журнале.
+SLOW_LOG_SIZE = 100
+# Операторы, для которых можно получить EXPLAIN QUERY PLAN.
+EXPLAIN_PREFIXES = ("SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "WITH")
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+    """Распределение задержек и суммарное количество строк для одной операции."""
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, ms, rows=0):
+        """Учитывает один вызов длительностью ms миллисекунд."""
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.rows += rows
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def snapshot(self):
+        """Возвращает статистику в виде словаря."""
+        labels = [f"<={bound}" for bound in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}"]
+        return {"count": self.count, "total_ms": self.total_ms,
+                "mean_ms": self.total_ms / self.count if self.count else 0.0,
+                "max_ms": self.max_ms, "rows": self.rows,
+                "histogram": {label: n for label, n in zip(labels, self.buckets) if n}}
+
+
+class QueryStats:
+    """
+    Статистика запросов одного соединения.
+
+    Parameters
+    ----------
+    slow_query_ms : float
+        Порог в миллисекундах, начиная с которого оператор попадает
+        в журнал медленных запросов.
+    slow_log_size : int
+        Количество хранимых записей журнала медленных запросов.
+    """
+    def __init__(self, slow_query_ms=SLOW_QUERY_MS, slow_log_size=SLOW_LOG_SIZE):
+        self.slow_query_ms = slow_query_ms
+        self.methods = {}
+        self.statements = {}
+        self.transactions = {"begin": 0, "commit": 0, "rollback": 0}
+        self.slow_queries = deque(maxlen=slow_log_size)
+
+    def record_method(self, name, ms):
+        """Учитывает вызов метода Database."""
+        self.methods.setdefault(name, Histogram()).add(ms)
+
+    def record_statement(self, sql, ms, rows=0):
+        """
+        Учитывает выполнение SQL-оператора.
+
+        Returns
+        -------
+        Histogram
+            Статистика оператора, к которой курсор добавляет прочитанные строки.
+        """
+        histogram = self.statements.setdefault(_normalize(sql), Histogram())
+        histogram.add(ms, rows)
+        return histogram
+
+    def record_slow(self, sql, ms, plan):
+        """Добавляет оператор в журнал медленных запросов и пишет его в лог."""
+        self.slow_queries.append({"time": datetime.now().isoformat(timespec="seconds"),
+                                  "sql": _normalize(sql), "ms": ms, "plan": plan})
+        logger.warning("Медленный запрос (%.1f мс): %s\n%s", ms, _normalize(sql), "\n".join(plan or []))
+
+    def trace(self, sql):
+        """Обработчик set_trace_callback: считает начала и завершения транзакций."""
+        keyword = sql.lstrip()[:8].upper()
+        for name in self.transactions:
+            if keyword.startswith(name.upper()):
+                self.transactions[name] += 1
+
+    def wrap(self, name, method):
+        """
+        Возвращает обёртку метода, замеряющую время каждого вызова.
+
+        Если метод возвращает генератор (iter_clients и подобные), замеряется
+        время его перебора без учёта работы вызывающего кода между
+        элементами; вызов записывается, когда генератор исчерпан или закрыт.
+        """
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            except BaseException:
+                self.record_method(name, (time.perf_counter() - started) * 1000)
+                raise
+            elapsed = time.perf_counter() - started
+            if inspect.isgenerator(result):
+                return self._timed_iteration(name, result, elapsed)
+            self.record_method(name, elapsed * 1000)
+            return result
+        return wrapper
+
+    def _timed_iteration(self, name, generator, elapsed):
+        """Перебирает generator, суммируя время, проведённое внутри него."""
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = next(generator)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - started
+                yield item
+        finally:
+            generator.close()
+            self.record_method(name, elapsed * 1000)
+
+    def snapshot(self):
+        """
+        Возвращает снимок статистики.
+
+        Returns
+        -------
+        dict
+            Ключи 'methods' и 'statements' (словари Histogram.snapshot
+            по имени метода и тексту оператора), 'transactions' и
+            'slow_queries' (последние медленные запросы с планами).
+        """
+        return {"methods": {name: h.snapshot() for name, h in self.methods.items()},
+                "statements": {sql: h.snapshot() for sql, h in self.statements.items()},
+                "transactions": dict(self.transactions),
+                "slow_queries": list(self.slow_queries)}
+
+    def reset(self):
+        """Сбрасывает накопленную статистику."""
+        self.methods.clear()
+        self.statements.clear()
+        self.transactions = dict.fromkeys(self.transactions, 0)
+        self.slow_queries.clear()
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Курсор, замеряющий время выполнения операторов.
+
+    Замеряется вызов execute/executemany, то есть выполнение до первой
+    строки результата; полное время с чтением строк видно в статистике
+    вызвавшего метода Database. Строки SELECT учитываются по мере чтения.
+    """
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._record(sql, (time.perf_counter() - started) * 1000, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._record(sql, (time.perf_counter() - started) * 1000, None)
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            self._add_rows(1)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._add_rows(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        self._add_rows(len(rows))
+        return rows
+
+    def __next__(self):
+        row = super().__next__()
+        self._add_rows(1)
+        return row
+
+    def _add_rows(self, rows):
+        """Учитывает прочитанные строки последнего оператора."""
+        histogram = getattr(self, "_histogram", None)
+        if histogram is not None:
+            histogram.rows += rows
+
+    def _record(self, sql, ms, parameters):
+        """Записывает статистику оператора и при превышении порога — его план."""
+        stats = self.connection.stats
+        if stats is None:
+            return
+        self._histogram = stats.record_statement(sql, ms, max(self.rowcount, 0))
+        if ms >= stats.slow_query_ms:
+            stats.record_slow(sql, ms, self.connection.explain(sql, parameters))
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """
+    Соединение SQLite, передающее статистику в QueryStats.
+
+    Используется как factory в sqlite3.connect; статистика назначается
+    атрибутом stats после подключения.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = None
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def explain(self, sql, parameters):
+        """
+        Возвращает план выполнения оператора (EXPLAIN QUERY PLAN).
+
+        Returns
+        -------
+        list of str or None
+            Строки плана или None, если план получить нельзя (например,
+            для executemany, параметры которого уже прочитаны).
+        """
+        if parameters is None or not sql.lstrip().upper().startswith(EXPLAIN_PREFIXES):
+            return None
+        try:
+            # Обычный курсор, чтобы сам EXPLAIN не попадал в статистику.
+            cursor = super().cursor()
+            return [row[3] for row in cursor.execute("EXPLAIN QUERY PLAN " + sql, parameters)]
+        except sqlite3.Error:
+            return None
+
+
+def format_stats(snapshot, limit=10):
+    """
+    Форматирует снимок статистики для вывода в консоль или окно.
+
+    Parameters
+    ----------
+    snapshot : dict
+        Результат QueryStats.snapshot или Database.stats_snapshot.
+    limit : int
+        Количество методов и операторов с наибольшим суммарным временем.
+
+    Returns
+    -------
+    str
+        Текстовый отчёт.
+    """
+    lines = []
+    for name, cache in snapshot.get("cache", {}).items():
+        lines.append(f"Кэш {name}: попаданий {cache['hits']}, промахов {cache['misses']}, "
+                     f"записей {cache['size']} из {cache['maxsize']}")
+    if "transactions" not in snapshot:
+        lines.append("Сбор статистики запросов выключен.")
+        return "\n".join(lines)
+    lines.append("Транзакции: " + ", ".join(f"{name} {count}" for name, count in snapshot["transactions"].items()))
+    for title, key in (("Методы", "methods"), ("Операторы SQL", "statements")):
+        lines.append(f"{title} (по суммарному времени):")
+        lines.append(f"  {'вызовов':>8} {'всего, мс':>11} {'сред., мс':>10} {'макс., мс':>10} {'строк':>9}  имя")
+        items = sorted(snapshot[key].items(), key=lambda item: item[1]["total_ms"], reverse=True)
+        for name, h in items[:limit]:
+            rows = h["rows"] if key == "statements" else "-"
+            lines.append(f"  {h['count']:>8} {h['total_ms']:>11.1f} {h['mean_ms']:>10.2f} "
+                         f"{h['max_ms']:>10.2f} {rows:>9}  {name[:100]}")
+    lines.append(f"Медленные запросы: {len(snapshot['slow_queries'])}")
+    for query in snapshot["slow_queries"][-limit:]:
+        lines.append(f"  {query['time']} {query['ms']:.1f} мс: {query['sql'][:100]}")
+        lines.extend(f"      {step}" for step in query["plan"] or [])
+    return "\n".join(lines)
+
+
+def _normalize(sql):
+    """Приводит текст оператора к одной строке без лишних пробелов."""
+    return " ".join(sql.split())
@@ -1,7 +1,28 @@
-""" Точка входа в проект. """
+"""
+Точка входа в проект.
+"""
 
-from db import Database from gui import MainGUI
+import os
+from db import Database
+from gui import MainGUI
 
-def main(): """ Инициализирует базу данных и запускает графический интерфейс. """ db = Database("shop.db") # Если база данных пуста, добавим тестовые товары if not db.get_products(): from models import Product db.add_product(Product("Ноутбук", "Описание ноутбука", 75000)) db.add_product(Product("Смартфон", "Описание смартфона", 35000)) app = MainGUI(db) app.mainloop()
 
-if name == "main": main()
\ No newline at end of file
+def main():
+    """
+    Инициализирует базу данных и запускает графический интерфейс.
+
+    Переменная окружения SHOP_DB_STATS=1 включает сбор статистики запросов
+    (меню "Отчёты" -> "Статистика запросов").
+    """
+    db = Database("shop.db", instrument=os.environ.get("SHOP_DB_STATS") == "1")
+    # Если база данных пуста, добавим тестовые товары
+    if not db.get_products_page(limit=1):
+        from models import Product
+        db.add_product(Product("Ноутбук", "Описание ноутбука", 75000))
+        db.add_product(Product("Смартфон", "Описание смартфона", 35000))
+    app = MainGUI(db)
+    app.mainloop()
+
+
+if __name__ == "__main__":
+    main()
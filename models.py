@@ -1,145 +1,224 @@
 import re
 
-class Entity: """ Базовый класс для всех сущностей проекта.
-
-Parameters
-----------
-id : int, optional
-    Идентификатор сущности, по умолчанию None.
-"""
-def __init__(self, id=None):
-    self._id = id  # Инкапсуляция: защищённое поле для идентификатора
-
-@property
-def id(self):
-    """Получить идентификатор."""
-    return self._id
-
-@id.setter
-def id(self, value):
-    self._id = value
-
-def __str__(self):
-    return f"{self.__class__.__name__}(id={self._id})"
-class Client(Entity): """ Класс клиента. Содержит данные о клиенте и методы валидации контактов (телефон, email).
-
-Parameters
-----------
-name : str
-    Имя клиента.
-phone : str
-    Телефон клиента.
-email : str
-    Email клиента.
-id : int, optional
-    Идентификатор клиента, по умолчанию None.
-"""
-def __init__(self, name, phone, email, id=None):
-    super().__init__(id)
-    self.name = name
-    self.phone = phone
-    self.email = email
-
-def validate(self):
+# Шаблоны проверки контактов компилируются один раз при импорте модуля.
+PHONE_PATTERN = re.compile(r"^\+?\d{7,15}$")
+EMAIL_PATTERN = re.compile(r"^[\w\.-]+@[\w\.-]+\.\w+$")
+
+# Причина отклонения в зависимости от (телефон корректен, email корректен).
+_CONTACT_ERRORS = {
+    (False, True): "некорректный телефон",
+    (True, False): "некорректный email",
+    (False, False): "некорректные телефон и email",
+}
+
+
+def _match_column(pattern, values):
+    """Проверяет столбец значений шаблоном; нестроковые значения считаются некорректными."""
+    try:
+        return [match is not None for match in map(pattern.match, values)]
+    except TypeError:
+        return [isinstance(value, str) and pattern.match(value) is not None for value in values]
+
+
+def validate_contacts(phones, emails):
     """
-    Валидирует телефон и email клиента с использованием регулярных выражений.
+    Пакетно проверяет телефоны и email, например столбцы импортируемого файла.
+
+    Шаблоны применяются ко всему столбцу сразу через map, без создания
+    объектов Client для каждой строки.
+
+    Parameters
+    ----------
+    phones : iterable of str
+        Телефоны (список, pandas.Series и т.п.).
+    emails : iterable of str
+        Email в том же порядке.
 
     Returns
     -------
-    bool
-        True, если телефон и email соответствуют требованиям, иначе False.
+    list of str or None
+        Для каждой строки None, если контакты корректны, иначе причина
+        отклонения. Маска некорректных строк: [reason is not None for reason in result].
     """
-    phone_pattern = r"^\+?\d{7,15}$"
-    email_pattern = r"^[\w\.-]+@[\w\.-]+\.\w+$"
-    valid_phone = re.match(phone_pattern, self.phone)
-    valid_email = re.match(email_pattern, self.email)
-    return bool(valid_phone and valid_email)
-
-def __str__(self):
-    return f"Client(id={self.id}, name={self.name})"
-class Product(Entity): """ Класс товара.
-
-Parameters
-----------
-name : str
-    Наименование товара.
-description : str
-    Описание товара.
-price : float
-    Цена товара.
-id : int, optional
-    Идентификатор товара, по умолчанию None.
-"""
-def __init__(self, name, description, price, id=None):
-    super().__init__(id)
-    self.name = name
-    self.description = description
-    self.price = price
-
-def __str__(self):
-    return f"Product(id={self.id}, name={self.name}, price={self.price})"
-class Order(Entity): """ Класс заказа.
-
-Parameters
-----------
-client : Client
-    Клиент, сделавший заказ.
-products : list of tuple(Product, int)
-    Список кортежей, где каждый кортеж содержит объект Product и количество (int).
-order_date : str
-    Дата заказа.
-id : int, optional
-    Идентификатор заказа, по умолчанию None.
-"""
-def __init__(self, client, products, order_date, id=None):
-    super().__init__(id)
-    self.client = client
-    self.products = products  # [(Product, количество)]
-    self.order_date = order_date
-
-def total_cost(self):
+    valid_phones = _match_column(PHONE_PATTERN, list(phones))
+    valid_emails = _match_column(EMAIL_PATTERN, list(emails))
+    return [None if phone and email else _CONTACT_ERRORS[(phone, email)]
+            for phone, email in zip(valid_phones, valid_emails)]
+
+
+class Entity:
     """
-    Рассчитывает общую стоимость заказа.
+    Базовый класс для всех сущностей проекта.
 
-    Returns
-    -------
-    float
-        Суммарная стоимость заказа.
+    Parameters
+    ----------
+    id : int, optional
+        Идентификатор сущности, по умолчанию None.
     """
-    return sum(product.price * qty for product, qty in self.products)
-
-def __str__(self):
-    return f"Order(id={self.id}, client={self.client.name}, date={self.order_date}, total_cost={self.total_cost()})"
-class SpecialOrder(Order): """ Наследник Order для специальных заказов со скидкой.
-
-Parameters
-----------
-discount : float
-    Скидка в процентах, применяемая к сумме заказа.
-"""
-def __init__(self, client, products, order_date, discount, id=None):
-    super().__init__(client, products, order_date, id)
-    self.discount = discount
-
-def total_cost(self):
+    # Атрибуты хранятся в __slots__ без словаря __dict__ у каждого объекта:
+    # при выгрузке миллионов строк это заметно сокращает расход памяти.
+    # Поэтому добавлять объектам новые атрибуты на лету нельзя.
+    __slots__ = ("_id",)
+
+    def __init__(self, id=None):
+        self._id = id  # Инкапсуляция: защищённое поле для идентификатора
+
+    @property
+    def id(self):
+        """Получить идентификатор."""
+        return self._id
+
+    @id.setter
+    def id(self, value):
+        self._id = value
+
+    def __str__(self):
+        return f"{self.__class__.__name__}(id={self._id})"
+
+
+class Client(Entity):
+    """
+    Класс клиента. Содержит данные о клиенте и методы валидации контактов (телефон, email).
+
+    Parameters
+    ----------
+    name : str
+        Имя клиента.
+    phone : str
+        Телефон клиента.
+    email : str
+        Email клиента.
+    id : int, optional
+        Идентификатор клиента, по умолчанию None.
     """
-    Рассчитывает общую стоимость заказа с учётом скидки.
+    __slots__ = ("name", "phone", "email")
 
-    Returns
-    -------
-    float
-        Итоговая сумма заказа со скидкой.
+    def __init__(self, name, phone, email, id=None):
+        super().__init__(id)
+        self.name = name
+        self.phone = phone
+        self.email = email
+
+    def validate(self):
+        """
+        Валидирует телефон и email клиента с использованием регулярных выражений.
+
+        Returns
+        -------
+        bool
+            True, если телефон и email соответствуют требованиям, иначе False.
+        """
+        valid_phone = PHONE_PATTERN.match(self.phone)
+        valid_email = EMAIL_PATTERN.match(self.email)
+        return bool(valid_phone and valid_email)
+
+    def __str__(self):
+        return f"Client(id={self.id}, name={self.name})"
+
+
+class Product(Entity):
+    """
+    Класс товара.
+
+    Parameters
+    ----------
+    name : str
+        Наименование товара.
+    description : str
+        Описание товара.
+    price : float
+        Цена товара.
+    id : int, optional
+        Идентификатор товара, по умолчанию None.
+    """
+    __slots__ = ("name", "description", "price")
+
+    def __init__(self, name, description, price, id=None):
+        super().__init__(id)
+        self.name = name
+        self.description = description
+        self.price = price
+
+    def __str__(self):
+        return f"Product(id={self.id}, name={self.name}, price={self.price})"
+
+
+class Order(Entity):
+    """
+    Класс заказа.
+
+    Parameters
+    ----------
+    client : Client
+        Клиент, сделавший заказ.
+    products : list of tuple(Product, int)
+        Список кортежей, где каждый кортеж содержит объект Product и количество (int).
+    order_date : str
+        Дата заказа.
+    id : int, optional
+        Идентификатор заказа, по умолчанию None.
+    """
+    __slots__ = ("client", "products", "order_date")
+
+    def __init__(self, client, products, order_date, id=None):
+        super().__init__(id)
+        self.client = client
+        self.products = products  # [(Product, количество)]
+        self.order_date = order_date
+
+    def total_cost(self):
+        """
+        Рассчитывает общую стоимость заказа.
+
+        Returns
+        -------
+        float
+            Суммарная стоимость заказа.
+        """
+        return sum(product.price * qty for product, qty in self.products)
+
+    def __str__(self):
+        return f"Order(id={self.id}, client={self.client.name}, date={self.order_date}, total_cost={self.total_cost()})"
+
+
+class SpecialOrder(Order):
+    """
+    Наследник Order для специальных заказов со скидкой.
+
+    Parameters
+    ----------
+    discount : float
+        Скидка в процентах, применяемая к сумме заказа.
+    """
+    __slots__ = ("discount",)
+
+    def __init__(self, client, products, order_date, discount, id=None):
+        super().__init__(client, products, order_date, id)
+        self.discount = discount
+
+    def total_cost(self):
+        """
+        Рассчитывает общую стоимость заказа с учётом скидки.
+
+        Returns
+        -------
+        float
+            Итоговая сумма заказа со скидкой.
+        """
+        total = super().total_cost()
+        return total * (1 - self.discount / 100)
+
+    def __str__(self):
+        return f"SpecialOrder(id={self.id}, client={self.client.name}, date={self.order_date}, total_cost={self.total_cost()}, discount={self.discount}%)"
+
+
+def print_order_cost(order):
+    """
+    Демонстрация полиморфизма: вывод стоимости заказа, независимо от того, обычный ли это заказ или специальный.
+
+    Parameters
+    ----------
+    order : Order
+        Объект заказа.
     """
-    total = super().total_cost()
-    return total * (1 - self.discount / 100)
-
-def __str__(self):
-    return f"SpecialOrder(id={self.id}, client={self.client.name}, date={self.order_date}, total_cost={self.total_cost()}, discount={self.discount}%)"
-def print_order_cost(order): """ Демонстрация полиморфизма: вывод стоимости заказа, независимо от того, обычный ли это заказ или специальный.
-
-Parameters
-----------
-order : Order
-    Объект заказа.
-"""
-print(f"Заказ клиента {order.client.name} стоит {order.total_cost():.2f}")
\ No newline at end of file
+    print(f"Заказ клиента {order.client.name} стоит {order.total_cost():.2f}")
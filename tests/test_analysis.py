@@ -0,0 +1,100 @@
+"""
+Модуль test_analysis.py
+Регрессионные проверки загрузчиков датафреймов analysis.
+
+Запуск: python -m pytest tests
+"""
+
+import os
+import tempfile
+import unittest
+import warnings
+from unittest import mock
+from db import Database
+from models import Client, Product, Order
+
+try:
+    import pandas  # noqa: F401
+except ImportError:
+    pandas = None
+
+
+@unittest.skipIf(pandas is None, "нужен pandas")
+class LoadOrdersTest(unittest.TestCase):
+    """Загрузка заказов в датафрейм load_orders_df."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, "test.db"))
+        self.client = Client("Клиент", "+79123456789", "client@example.com")
+        self.db.add_client(self.client)
+        self.product = Product("Товар", "", 100.0)
+        self.db.add_product(self.product)
+
+    def tearDown(self):
+        self.db.conn.close()
+        self.tmp.cleanup()
+
+    def test_iso_dates_are_parsed(self):
+        import analysis
+        for order_date in ("2024-01-01", "2024-01-01T10:00:00", "2024-01-02 11:00:00"):
+            self.db.add_order(Order(self.client, [(self.product, 1)], order_date))
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            df = analysis.load_orders_df(self.db, chunk_size=2)
+        self.assertEqual(df["order_date"].isna().sum(), 0)
+        self.assertEqual(str(df["order_date"].iloc[1]), "2024-01-01 10:00:00")
+        self.assertEqual(df["client"].dtype.name, "category")
+
+    def test_invalid_date_warns(self):
+        import analysis
+        self.db.add_order(Order(self.client, [(self.product, 1)], "не дата"))
+        with self.assertWarns(UserWarning):
+            df = analysis.load_orders_df(self.db)
+        self.assertTrue(df["order_date"].isna().all())
+
+
+@unittest.skipIf(pandas is None, "нужен pandas")
+class OrdersOverTimeTest(unittest.TestCase):
+    """Период графика orders_over_time."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, "test.db"))
+        client = Client("Клиент", "+79123456789", "client@example.com")
+        self.db.add_client(client)
+        product = Product("Товар", "", 100.0)
+        self.db.add_product(product)
+        for order_date in ("2024-01-01 10:00:00", "2024-01-02 10:00:00", "2024-01-03 10:00:00"):
+            self.db.add_order(Order(client, [(product, 1)], order_date))
+
+    def tearDown(self):
+        self.db.conn.close()
+        self.tmp.cleanup()
+
+    def plotted_days(self, source, **period):
+        import analysis
+        plotted = []
+
+        def downsample(series, max_points):
+            plotted.extend(str(day) for day in series.index)
+            return series, 1
+
+        output = os.path.join(self.tmp.name, "orders.png")
+        with mock.patch.object(analysis, "_downsample", downsample):
+            analysis.orders_over_time(source, output=output, **period)
+        return plotted
+
+    def test_database_period(self):
+        days = self.plotted_days(self.db, date_from="2024-01-02", date_to="2024-01-03")
+        self.assertEqual(days, ["2024-01-02"])
+
+    def test_dataframe_period(self):
+        import analysis
+        df = analysis.load_orders_df(self.db)
+        days = self.plotted_days(df, date_from="2024-01-02")
+        self.assertEqual(days, ["2024-01-02", "2024-01-03"])
+
+
+if __name__ == "__main__":
+    unittest.main()
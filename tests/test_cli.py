@@ -0,0 +1,60 @@
+"""
+Модуль test_cli.py
+Проверки кодов завершения консольных команд.
+
+Запуск: python -m pytest tests
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+import cli
+
+
+class ExitCodeTest(unittest.TestCase):
+    """Неудачный импорт и экспорт завершаются ненулевым кодом."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "test.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_cli(self, *argv):
+        stderr = io.StringIO()
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(stderr):
+            code = cli.main(["--db", self.db_path, "--quiet", *argv])
+        return code, stderr.getvalue()
+
+    def test_import_missing_file(self):
+        code, stderr = self.run_cli("import-clients", os.path.join(self.tmp.name, "missing.csv"))
+        self.assertEqual(code, 1)
+        self.assertIn("Импорт прерван", stderr)
+
+    def test_import_invalid_json(self):
+        path = os.path.join(self.tmp.name, "bad.json")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("{bad")
+        code, stderr = self.run_cli("import-clients", path)
+        self.assertEqual(code, 1)
+        self.assertIn("Импорт прерван", stderr)
+
+    def test_parallel_import_missing_file(self):
+        path = os.path.join(self.tmp.name, "clients.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"name": "Клиент", "phone": "+79123456789", "email": "client@example.com"}\n')
+        code, stderr = self.run_cli("import-clients", path, os.path.join(self.tmp.name, "missing.jsonl"))
+        self.assertEqual(code, 1)
+        self.assertIn("missing.jsonl", stderr)
+
+    def test_export_unwritable_path(self):
+        code, stderr = self.run_cli("export-clients", os.path.join(self.tmp.name, "missing", "clients.csv"))
+        self.assertEqual(code, 1)
+        self.assertIn("Экспорт прерван", stderr)
+
+    def test_export_succeeds(self):
+        code, _ = self.run_cli("export-clients", os.path.join(self.tmp.name, "clients.jsonl"))
+        self.assertEqual(code, 0)
@@ -0,0 +1,199 @@
+"""
+Модуль test_db.py
+Регрессионные проверки методов Database на временной базе.
+
+Запуск: python -m pytest tests
+"""
+
+import csv
+import os
+import tempfile
+import unittest
+from db import Database
+from models import Client, Product, Order
+
+
+class AddEntityIdTest(unittest.TestCase):
+    """Идентификаторы, назначаемые add_client и add_product."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, "test.db"))
+
+    def tearDown(self):
+        self.db.conn.close()
+        self.tmp.cleanup()
+
+    def test_add_client_assigns_distinct_ids(self):
+        clients = [Client(f"Клиент {i}", "+79123456789", f"client{i}@example.com") for i in range(3)]
+        for client in clients:
+            self.db.add_client(client)
+        self.assertEqual([client.id for client in clients], [1, 2, 3])
+        self.assertEqual(self.db.get_client(clients[1].id).name, "Клиент 1")
+
+    def test_add_product_assigns_distinct_ids(self):
+        products = [Product(f"Товар {i}", "", 10.0 * (i + 1)) for i in range(3)]
+        for product in products:
+            self.db.add_product(product)
+        self.assertEqual([product.id for product in products], [1, 2, 3])
+        self.assertEqual(self.db.get_product(products[2].id).name, "Товар 2")
+
+    def test_order_refers_to_added_client(self):
+        clients = [Client(f"Клиент {i}", "+79123456789", f"client{i}@example.com") for i in range(2)]
+        for client in clients:
+            self.db.add_client(client)
+        product = Product("Товар", "", 100.0)
+        self.db.add_product(product)
+        order = Order(clients[1], [(product, 1)], "2024-06-01 12:00:00")
+        self.db.add_order(order)
+        client_id = self.db.conn.execute("SELECT client_id FROM orders WHERE id = ?", (order.id,)).fetchone()[0]
+        self.assertEqual(client_id, clients[1].id)
+
+
+class OrdersPageTest(unittest.TestCase):
+    """Страницы заказов get_orders_page."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, "test.db"))
+        clients = [Client(f"Клиент {i}", "+79123456789", f"client{i}@example.com") for i in range(3)]
+        for client in clients:
+            self.db.add_client(client)
+        product = Product("Товар", "", 100.0)
+        self.db.add_product(product)
+        self.db.add_orders(Order(clients[i % 3], [(product, 1)], f"2024-06-{i + 1:02d} 12:00:00") for i in range(10))
+
+    def tearDown(self):
+        self.db.conn.close()
+        self.tmp.cleanup()
+
+    def test_offset_page(self):
+        page = self.db.get_orders_page(limit=3, offset=4)
+        self.assertEqual([(row[0], row[2]) for row in page], [(5, "Клиент 1"), (6, "Клиент 2"), (7, "Клиент 0")])
+
+    def test_descending_offset_page(self):
+        page = self.db.get_orders_page(limit=2, offset=1, descending=True)
+        self.assertEqual([row[0] for row in page], [9, 8])
+
+    def test_filtered_keyset_page(self):
+        page = self.db.get_orders_page(limit=5, after_id=2, date_to="2024-06-05")
+        self.assertEqual([row[0] for row in page], [3, 4])
+
+
+class ImportClientsTest(unittest.TestCase):
+    """Пакетный импорт клиентов."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, "test.db"))
+
+    def tearDown(self):
+        self.db.conn.close()
+        self.tmp.cleanup()
+
+    def test_rejected_rows(self):
+        rows = [{"name": "Клиент", "phone": "+79123456789", "email": "client@example.com"},
+                [1, 2], "строка", {"name": "Без email", "phone": "+79123456789"}]
+        imported, rejected = self.db.import_clients(rows)
+        self.assertEqual(imported, 1)
+        self.assertEqual([(number, reason) for number, _, reason in rejected],
+                         [(2, "строка не является объектом"), (3, "строка не является объектом"),
+                          (4, "отсутствует поле 'email'")])
+
+    def test_upsert_counts(self):
+        rows = [{"name": "Иван", "phone": "+79123456789", "email": "ivan@example.com"},
+                {"name": "Пётр", "phone": "+79123456780", "email": "petr@example.com"}]
+        self.assertEqual(self.db.upsert_clients(rows)[0], {"inserted": 2, "updated": 0, "unchanged": 0})
+        rows[0] = dict(rows[0], name="Иван Петров", email="IVAN@example.com")
+        self.assertEqual(self.db.upsert_clients(rows)[0], {"inserted": 0, "updated": 1, "unchanged": 1})
+        self.assertEqual(self.db.count_clients(), 2)
+        self.assertEqual(self.db.get_client(1).name, "Иван Петров")
+
+    def test_file_errors_raise(self):
+        path = os.path.join(self.tmp.name, "clients.json")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("{bad")
+        for upsert in (False, True):
+            with self.assertRaises(ValueError):
+                self.db.import_clients_json(path, upsert=upsert)
+            with self.assertRaises(OSError):
+                self.db.import_clients_csv(os.path.join(self.tmp.name, "missing.csv"), upsert=upsert)
+
+    def write_file(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def test_files_checked_before_import(self):
+        good = self.write_file("good.csv", "name,phone,email\nКлиент,+79123456789,client@example.com\n")
+        missing = os.path.join(self.tmp.name, "missing.jsonl")
+        unknown = self.write_file("clients.txt", "")
+        with self.assertRaises(ValueError) as raised:
+            self.db.import_clients_files([good, missing, unknown], workers=1)
+        self.assertIn(missing, str(raised.exception))
+        self.assertIn(unknown, str(raised.exception))
+        self.assertEqual(self.db.count_clients(), 0)
+
+    def test_split_files_match_sequential_import(self):
+        csv_path = os.path.join(self.tmp.name, "clients.csv")
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["name", "phone", "email"])
+            for i in range(60):
+                name = f'Клиент {i}\n"вторая" строка' if i % 4 == 0 else f"Клиент {i}"
+                writer.writerow([name, "bad" if i % 9 == 0 else "+79123456789", f"client{i}@example.com"])
+        jsonl_path = self.write_file("clients.jsonl", "".join(
+            f'{{"name": "Клиент \\"{i}", "phone": "+79123456789", "email": "jsonl{i}@example.com"}}\n'
+            + ("\n{bad\n" if i % 10 == 0 else "") for i in range(60)))
+        expected = Database(os.path.join(self.tmp.name, "expected.db"))
+        expected_rejected = [(csv_path, *row) for row in expected.import_clients_csv(csv_path)[1]]
+        expected_rejected += [(jsonl_path, *row) for row in expected.import_clients_json(jsonl_path, json_lines=True)[1]]
+        processed = []
+        imported, rejected = self.db.import_clients_files([csv_path, jsonl_path], workers=2, split_bytes=200,
+                                                          chunk_size=5, progress=processed.append)
+        query = "SELECT id, name, phone, email FROM clients ORDER BY id"
+        self.assertEqual(self.db.conn.execute(query).fetchall(), expected.conn.execute(query).fetchall())
+        self.assertEqual(rejected, expected_rejected)
+        self.assertEqual(imported, expected.count_clients())
+        self.assertGreater(len(processed), 20)
+        expected.conn.close()
+
+    def test_unparsable_file_raises(self):
+        good = self.write_file("good.jsonl", '{"name": "Клиент", "phone": "+79123456789", '
+                                             '"email": "client@example.com"}\n')
+        bad = self.write_file("bad.json", "{bad")
+        with self.assertRaises(ValueError) as raised:
+            self.db.import_clients_files([good, bad], workers=1)
+        self.assertIn(bad, str(raised.exception))
+        self.assertEqual(self.db.count_clients(), 1)
+
+
+class ReadCatchUpTest(unittest.TestCase):
+    """Чтение сводных данных не фиксирует и не откатывает транзакцию вызывающего."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, "test.db"))
+        self.client = Client("Клиент", "+79123456789", "client@example.com")
+        self.db.add_client(self.client)
+
+    def tearDown(self):
+        self.db.conn.close()
+        self.tmp.cleanup()
+
+    def test_reads_keep_open_transaction(self):
+        self.db.conn.execute("INSERT INTO orders (order_date, client_id) VALUES ('2024-06-01 12:00:00', ?)",
+                             (self.client.id,))
+        self.db.conn.execute("INSERT INTO clients (name, phone, email) VALUES ('Иван', '', '')")
+        self.assertEqual(self.db.get_top_clients()[0][2], 1)
+        self.assertEqual(len(self.db.search_clients("Иван")), 1)
+        self.assertTrue(self.db.conn.in_transaction)
+        self.db.conn.rollback()
+        self.assertEqual(self.db.count_orders(), 0)
+        self.assertEqual(self.db.get_top_clients(), [])
+        self.assertEqual(self.db.search_clients("Иван"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+Модуль worker.py
+Содержит фоновый поток для выполнения операций с базой данных вне цикла событий tkinter.
+"""
+
+import queue
+import threading
+from db import Database
+
+
+class Task:
+    """
+    Задача, выполняемая фоновым потоком DatabaseWorker.
+
+    Parameters
+    ----------
+    func : callable
+        Функция func(db, task), выполняемая в фоновом потоке.
+    on_done : callable, optional
+        Вызывается в главном потоке с результатом func.
+    on_error : callable, optional
+        Вызывается в главном потоке с исключением, если func завершилась ошибкой.
+    on_progress : callable, optional
+        Вызывается в главном потоке со значением, переданным в report_progress.
+    """
+    def __init__(self, func, on_done=None, on_error=None, on_progress=None):
+        self.func = func
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self._cancel = threading.Event()
+        self._results = None  # Очередь результатов назначается воркером
+
+    def cancel(self):
+        """Запрашивает отмену задачи."""
+        self._cancel.set()
+
+    def is_cancelled(self):
+        """Проверяет, запрошена ли отмена задачи."""
+        return self._cancel.is_set()
+
+    def report_progress(self, value):
+        """Передаёт значение прогресса в главный поток (вызывается из func)."""
+        if self.on_progress is not None:
+            self._results.put((self.on_progress, value))
+
+
+class DatabaseWorker:
+    """
+    Фоновый поток, выполняющий операции с базой данных по очереди.
+
+    Поток открывает собственное соединение SQLite, так как соединение нельзя
+    использовать из разных потоков. Результаты передаются обратно в главный
+    поток через очередь, которую опрашивает root.after, поэтому обработчики
+    on_done/on_error/on_progress могут безопасно работать с виджетами.
+
+    Parameters
+    ----------
+    root : tk.Misc
+        Виджет, через метод after которого опрашивается очередь результатов.
+    db_name : str
+        Имя файла базы данных.
+    poll_interval : int
+        Период опроса очереди результатов в миллисекундах.
+    **db_options
+        Дополнительные параметры Database (например, profile).
+    """
+    def __init__(self, root, db_name, poll_interval=50, **db_options):
+        self.root = root
+        self.db_name = db_name
+        self.db_options = db_options
+        self.poll_interval = poll_interval
+        self._tasks = queue.Queue()
+        self._results = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self.root.after(self.poll_interval, self._poll)
+
+    def submit(self, func, on_done=None, on_error=None, on_progress=None):
+        """
+        Ставит функцию в очередь на выполнение в фоновом потоке.
+
+        Parameters
+        ----------
+        func : callable
+            Функция func(db, task), где db — Database фонового потока.
+        on_done, on_error, on_progress : callable, optional
+            Обработчики, вызываемые в главном потоке, см. Task.
+
+        Returns
+        -------
+        Task
+            Задача, через которую можно запросить отмену.
+        """
+        task = Task(func, on_done, on_error, on_progress)
+        task._results = self._results
+        self._tasks.put(task)
+        return task
+
+    def stop(self):
+        """Завершает фоновый поток после выполнения уже поставленных задач."""
+        self._tasks.put(None)
+
+    def _run(self):
+        """Цикл фонового потока."""
+        db = Database(self.db_name, **self.db_options)
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                break
+            try:
+                result = task.func(db, task)
+            except Exception as e:
+                self._results.put((task.on_error, e))
+            else:
+                self._results.put((task.on_done, result))
+        db.conn.close()
+
+    def _poll(self):
+        """Вызывает в главном потоке обработчики готовых результатов."""
+        while True:
+            try:
+                callback, value = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if callback is not None:
+                callback(value)
+        self.root.after(self.poll_interval, self._poll)